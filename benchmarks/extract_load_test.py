@@ -0,0 +1,139 @@
+"""
+Load test of BaseExtractor against the local OMDb stub.
+
+Starts an OmdbStub with the requested fault injection, then drives
+BaseExtractor.fetch_data() over a fixed list of synthetic titles at each
+concurrency level and reports throughput together with p50/p95/p99 request
+latencies and the outcome counts. No network access or API quota is used.
+
+Usage (from the repository root):
+    python benchmarks/extract_load_test.py --titles 2000 --workers 1 4 8 16 32 --latency-ms 40
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from api import BaseExtractor  # noqa: E402
+from omdb_stub import OmdbStub  # noqa: E402
+
+
+class TitleListExtractor(BaseExtractor):
+    """
+    BaseExtractor fetching a fixed list of titles instead of discovering them
+    in the warehouse, recording the latency of every request.
+    """
+
+    def __init__(self, titles: list, **kwargs):
+        super().__init__(**kwargs)
+        self.titles = titles
+        self.latencies = []
+        self._latency_lock = threading.Lock()
+
+    def fetch_titles_param(self):
+        return self.titles
+
+    def _report_failures(self, results: list):
+        # failures are summarized per level instead of printed one by one
+        self.failures = [result for result in results if not result.ok]
+
+    def _fetch_one(self, params: dict):
+        start = time.perf_counter()
+        result = super()._fetch_one(params)
+        elapsed = time.perf_counter() - start
+        with self._latency_lock:
+            self.latencies.append(elapsed)
+        return result
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Returns the `pct` percentile of `values` (nearest rank).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def run_level(url: str, titles: list, workers: int, requests_per_second: float) -> dict:
+    """
+    Fetches all titles once with `workers` threads.
+
+    Returns:
+        dict: Throughput, latency percentiles (ms) and outcome counts.
+    """
+    extractor = TitleListExtractor(titles, max_workers=workers,
+                                   requests_per_second=requests_per_second, url=url)
+    start = time.perf_counter()
+    records = extractor.fetch_data()
+    wall_time = time.perf_counter() - start
+
+    errors = {}
+    for failure in extractor.failures:
+        key = f"HTTP {failure.status_code}" if failure.status_code != 200 else "not found"
+        errors[key] = errors.get(key, 0) + 1
+    latencies = extractor.latencies
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "records": len(records),
+        "wall_time": round(wall_time, 3),
+        "throughput_rps": round(len(latencies) / wall_time, 1) if wall_time > 0 else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "failures": errors,
+    }
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test BaseExtractor against a local OMDb stub.")
+    parser.add_argument("--titles", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--requests-per-second", type=float, default=None,
+                        help="BaseExtractor rate limit, unlimited by default")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--miss-rate", type=float, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0)
+    parser.add_argument("--max-rps", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("API_KEY", "load-test")
+    titles = [f"Synthetic Movie {i:07d}" for i in range(args.titles)]
+    results = []
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  failures")
+    for workers in args.workers:
+        # a fresh stub per level, so every level sees the same injected outcomes
+        with OmdbStub(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                      error_rate=args.error_rate, miss_rate=args.miss_rate,
+                      rate_limit_rate=args.rate_limit_rate, max_rps=args.max_rps,
+                      seed=args.seed) as stub:
+            level = run_level(stub.url, titles, workers, args.requests_per_second)
+        results.append(level)
+        print(f"{workers:>7} {level['throughput_rps']:>9} {level['p50_ms']:>9} "
+              f"{level['p95_ms']:>9} {level['p99_ms']:>9}  {level['failures'] or '-'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Local OMDb-compatible stub server for offline extraction tests.
+
+Every `?t=<title>` request is answered with the omdapi.json sample, with the
+title and imdbID replaced, so responses have exactly the shape BaseExtractor
+gets from www.omdbapi.com. Latency, HTTP 500 errors, "Response": "False"
+misses and 429 rate-limit replies can be injected. Outcomes are drawn from a
+seeded generator, so a given seed and request order reproduce the same run.
+
+Usage (from the repository root):
+    python benchmarks/omdb_stub.py --port 8765 --latency-ms 40 --error-rate 0.01
+
+and point BaseExtractor(url="http://127.0.0.1:8765/") at it.
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "omdapi.json")
+
+
+class OmdbStub:
+    """
+    Threaded HTTP server imitating the OMDb API.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind, 0 picks a free one
+        latency_ms: Mean added latency per request
+        jitter_ms: Maximum random deviation from the mean latency
+        error_rate: Share of requests answered with HTTP 500
+        miss_rate: Share of requests answered with "Response": "False"
+        rate_limit_rate: Share of requests answered with HTTP 429
+        max_rps: Requests per second above which every request gets a 429, None disables it
+        seed: Seed for the injected outcomes
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0,
+                 jitter_ms: float = 0, error_rate: float = 0, miss_rate: float = 0,
+                 rate_limit_rate: float = 0, max_rps: float = None, seed: int = 42):
+        with open(SAMPLE_PATH, encoding="utf-8") as f:
+            self.sample = json.load(f)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.miss_rate = miss_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_rps = max_rps
+        self.counts = {"ok": 0, "miss": 0, "error": 0, "rate_limited": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = (0, 0)
+        self._thread = None
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body are written separately; avoid Nagle + delayed ACK stalls
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, body, headers = stub.respond(parse_qs(urlparse(self.path).query))
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _over_rate(self) -> bool:
+        if not self.max_rps:
+            return False
+        second = int(time.monotonic())
+        window_second, count = self._window
+        count = count + 1 if window_second == second else 1
+        self._window = (second, count)
+        return count > self.max_rps
+
+    def respond(self, query: dict) -> tuple:
+        """
+        Decides the outcome of one request.
+
+        Args:
+            query (dict): Parsed query string.
+
+        Returns:
+            tuple: HTTP status, JSON body and extra headers.
+        """
+        with self._lock:
+            draw = self._random.random()
+            delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            over_rate = self._over_rate()
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        if not query.get("apikey"):
+            return 401, {"Response": "False", "Error": "No API key provided."}, {}
+        if over_rate or draw < self.rate_limit_rate:
+            outcome, status = "rate_limited", 429
+            body, headers = {"Response": "False", "Error": "Request limit reached!"}, {"Retry-After": "1"}
+        elif draw < self.rate_limit_rate + self.error_rate:
+            outcome, status = "error", 500
+            body, headers = {"Response": "False", "Error": "Internal server error"}, {}
+        elif draw < self.rate_limit_rate + self.error_rate + self.miss_rate:
+            outcome, status = "miss", 200
+            body, headers = {"Response": "False", "Error": "Movie not found!"}, {}
+        else:
+            title = query.get("t", [""])[0] or query.get("i", [""])[0]
+            outcome, status, headers = "ok", 200, {}
+            body = dict(self.sample)
+            body["Title"] = title
+            body["imdbID"] = "tt" + str(zlib.crc32(title.encode("utf-8")) % 10**7).zfill(7)
+        with self._lock:
+            self.counts[outcome] += 1
+        return status, body, headers
+
+    def start(self):
+        """
+        Serves requests on a background thread.
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OMDb-compatible stub server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--miss-rate", type=float, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0)
+    parser.add_argument("--max-rps", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    stub = OmdbStub(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+                    args.miss_rate, args.rate_limit_rate, args.max_rps, args.seed)
+    print(f"OMDb stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+        print(f"Served: {stub.counts}")
+
+
+if __name__ == "__main__":
+    main()
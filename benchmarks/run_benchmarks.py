@@ -0,0 +1,257 @@
+"""
+Benchmark harness for the warehouse build.
+
+For every requested scale it generates (or reuses) a seeded synthetic dataset,
+then runs two cases, each in a fresh process so peak RSS is not shared:
+
+    steps: every create_* and insert_* step of ExtendedDatabaseManager, timed
+           one by one on a new database, with movies loaded straight from NDJSON
+    main:  the full main() pipeline, with OMDb answers served from a pre-seeded
+           ResponseCache so no HTTP request is made
+
+Wall time and rows/sec of every step and the peak RSS of every case are
+written to a JSON results file. With a baseline file present every measurement
+is compared against it and the run exits with status 1 if any step got slower,
+or any case bigger, than the tolerance allows.
+
+Usage (from the repository root):
+    python benchmarks/run_benchmarks.py --scale xs s
+    python benchmarks/run_benchmarks.py --scale xs --update-baseline
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import SCALES, generate_dataset, seed_response_cache  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_DATA_DIR = os.path.join(BENCH_DIR, "data")
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# differences below this are treated as timer noise
+MIN_TIME_DELTA = 0.05
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _count(db, table: str) -> int:
+    return db.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def _measure(name: str, func, db, table: str = None) -> dict:
+    """
+    Runs one step and returns its timing. Rows are the growth of `table`.
+    """
+    before = _count(db, table) if table else 0
+    start = time.perf_counter()
+    func()
+    wall_time = time.perf_counter() - start
+    rows = _count(db, table) - before if table else 0
+    print(f"  {name:<32} {wall_time:8.3f}s {rows:>12,} rows")
+    return {
+        "wall_time": round(wall_time, 4),
+        "rows": rows,
+        "rows_per_sec": round(rows / wall_time, 1) if wall_time > 0 else None,
+    }
+
+
+def run_steps_case(paths: dict, work_dir: str) -> dict:
+    """
+    Times each ExtendedDatabaseManager step on an empty database.
+    """
+    from database import ExtendedDatabaseManager, ROLE_DIMENSIONS
+    from main import init_dim_date
+
+    results = {}
+    with ExtendedDatabaseManager(os.path.join(work_dir, "Movies.db"), raise_errors=True) as db:
+        steps = [
+            ("create_staging_tables", db.create_staging_tables, None),
+            ("create_dim_tables", db.create_dim_tables, None),
+            ("create_fact_tables", db.create_fact_tables, None),
+            ("create_metadata_tables", db.create_metadata_tables, None),
+            ("load_revenues", lambda: db.load_revenues(paths["revenues"]), "stg_Revenues"),
+            ("load_movies_from_ndjson", lambda: db.load_movies_from_ndjson(paths["movies"]), "stg_Movies"),
+            ("init_dim_date", lambda: init_dim_date(db), "dim_date"),
+            ("insert_to_dim_distrubtion", db.insert_to_dim_distrubtion, "dim_distribution"),
+            ("insert_to_dim_movie", db.insert_to_dim_movie, "dim_movies"),
+            ("insert_to_fact_revenue", db.insert_to_fact_revenue, "fact_revenue"),
+            ("explode_movie_roles", db.explode_movie_roles, "stg_Movie_Roles"),
+        ]
+        for role, config in ROLE_DIMENSIONS.items():
+            steps.append((f"insert_to_role_dimension[{role}]",
+                          lambda role=role: db.insert_to_role_dimension(role), config["table"]))
+        for role, config in ROLE_DIMENSIONS.items():
+            steps.append((f"insert_to_role_bridge[{role}]",
+                          lambda role=role: db.insert_to_role_bridge(role), config["bridge"]))
+        steps.append(("refresh_revenue_rollups", db.refresh_revenue_rollups, "agg_revenue_movie_year"))
+
+        for name, func, table in steps:
+            results[name] = _measure(name, func, db, table)
+    return results
+
+
+def run_main_case(paths: dict, work_dir: str, titles: int) -> dict:
+    """
+    Times a full main() run. OMDb lookups are answered by a ResponseCache
+    seeded with the synthetic records, so the whole extraction queue is
+    drained without HTTP requests or request budget.
+    """
+    os.environ.setdefault("API_KEY", "benchmark")
+    os.chdir(work_dir)
+    seed_response_cache("omdb_cache.db", paths["movies"], titles)
+
+    import main
+    from database import ExtendedDatabaseManager
+
+    start = time.perf_counter()
+    main.main(paths["revenues"])
+    wall_time = time.perf_counter() - start
+
+    with ExtendedDatabaseManager("Movies.db", read_only=True) as db:
+        rows = _count(db, "stg_Revenues")
+    return {"main": {
+        "wall_time": round(wall_time, 4),
+        "rows": rows,
+        "rows_per_sec": round(rows / wall_time, 1) if wall_time > 0 else None,
+    }}
+
+
+def _run_case(case: str, paths: dict, titles: int) -> tuple:
+    """
+    Runs one case and returns its step measurements and the peak RSS (MB) of
+    the process. The high-water mark only ever grows, so it is reported once
+    per case, which runs in a process of its own.
+    """
+    work_dir = tempfile.mkdtemp(prefix=f"omdb_bench_{case}_")
+    try:
+        if case == "steps":
+            measurements = run_steps_case(paths, work_dir)
+        else:
+            measurements = run_main_case(paths, work_dir, titles)
+        return measurements, round(_peak_rss_mb(), 1)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run(scales: list, seed: int, data_dir: str) -> dict:
+    """
+    Runs both cases for every scale, each case in its own process.
+
+    Returns:
+        dict: Step measurements keyed "<scale>/<case>/<step>" and the peak
+            RSS of every case keyed "<scale>/<case>".
+    """
+    results = {}
+    for scale in scales:
+        revenue_rows, titles = SCALES[scale]
+        print(f"Scale {scale}: {revenue_rows:,} revenue rows, {titles:,} titles")
+        paths = generate_dataset(os.path.abspath(data_dir), revenue_rows, titles, seed)
+        for case in ("steps", "main"):
+            print(f" case {case}")
+            # spawn, not fork: a forked child would inherit the parent's peak RSS
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                measurements, peak_rss_mb = executor.submit(_run_case, case, paths, titles).result()
+            for step, values in measurements.items():
+                results[f"{scale}/{case}/{step}"] = values
+            results[f"{scale}/{case}"] = {"peak_rss_mb": peak_rss_mb}
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns a description of every measurement that regressed against the
+    baseline by more than `tolerance` (relative).
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if "wall_time" in current and "wall_time" in previous:
+            time_limit = previous["wall_time"] * (1 + tolerance)
+            if current["wall_time"] > time_limit and \
+                    current["wall_time"] - previous["wall_time"] > MIN_TIME_DELTA:
+                regressions.append(
+                    f"{key}: wall time {current['wall_time']:.3f}s vs baseline {previous['wall_time']:.3f}s"
+                )
+        if "peak_rss_mb" in current and "peak_rss_mb" in previous and \
+                current["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: peak RSS {current['peak_rss_mb']:.1f} MB vs baseline {previous['peak_rss_mb']:.1f} MB"
+            )
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the warehouse build on synthetic data.")
+    parser.add_argument("--scale", nargs="+", default=["xs"], choices=list(SCALES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="baseline to compare against; a missing one exits with status 2")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative slowdown before a step counts as a regression")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="merge these results into the baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.seed, args.data_dir)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    results_path = os.path.join(args.results_dir, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump({"seed": args.seed, "results": results}, f, indent=2)
+    print(f"Results written to {results_path}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    # without a baseline nothing can be compared; fail instead of passing silently
+    if not baseline:
+        print(f"No baseline found at {args.baseline}, run with --update-baseline to record one.")
+        return 2
+    missing = [scale for scale in args.scale if not any(key.startswith(f"{scale}/") for key in baseline)]
+    if missing:
+        print(f"Baseline has no results for scale {', '.join(missing)}, "
+              f"run with --update-baseline to record them.")
+        return 2
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"PERFORMANCE REGRESSION ({len(regressions)}, tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
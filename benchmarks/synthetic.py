@@ -0,0 +1,203 @@
+"""
+Module generating seeded synthetic inputs for the warehouse benchmarks.
+
+The repository ships no revenue data and a single OMDb sample, so the
+benchmarks build their own: a revenue CSV shaped like revenues_per_day.csv
+and an NDJSON file of OMDb-shaped movie records (same fields as omdapi.json).
+Everything is generated inside DuckDB from hash() of the row number and the
+seed, so a given (scale, seed) always produces byte-identical files, even
+with a multi-threaded DuckDB.
+"""
+
+import os
+
+import duckdb
+
+from cache import ResponseCache
+
+
+# name: (revenue rows, distinct titles)
+SCALES = {
+    "xs": (10_000, 1_000),
+    "s": (100_000, 10_000),
+    "m": (1_000_000, 100_000),
+    "l": (10_000_000, 500_000),
+    "xl": (100_000_000, 1_000_000),
+}
+
+GENRES = [
+    "Action", "Adventure", "Animation", "Biography", "Comedy", "Crime",
+    "Documentary", "Drama", "Family", "Fantasy", "History", "Horror",
+    "Music", "Mystery", "Romance", "Sci-Fi", "Sport", "Thriller", "War", "Western",
+]
+DISTRIBUTORS = [
+    "Warner Bros.", "Universal", "Paramount", "Sony", "Lionsgate", "Disney",
+    "20th Century Fox", "MGM", "Focus Features", "A24", "Miramax", "New Line",
+]
+RATINGS = ["G", "PG", "PG-13", "R", "N/A"]
+
+# every n-th title is spelled with a dot in OMDb but without it in the revenue
+# file, and every n-th title has no OMDb record at all
+DOTTED_EVERY = 20
+MISSING_EVERY = 50
+
+
+def _sql_list(values: list) -> str:
+    return "[" + ", ".join("'" + value.replace("'", "''") + "'" for value in values) + "]"
+
+
+def _uniform(seed: int, salt: int, column: str = "i") -> str:
+    """
+    Returns a SQL expression for a reproducible uniform value in [0, 1).
+    """
+    return f"((hash({column}, {seed}, {salt}) % 1000000) / 1000000.0)"
+
+
+def _pick(values: list, seed: int, salt: int, column: str = "i") -> str:
+    """
+    Returns a SQL expression picking one element of `values` reproducibly.
+    """
+    return f"{_sql_list(values)}[1 + (hash({column}, {seed}, {salt}) % {len(values)})::INT]"
+
+
+def generate_dataset(out_dir: str, revenue_rows: int, titles: int, seed: int = 42) -> dict:
+    """
+    Writes a revenue CSV and an OMDb NDJSON file for the given scale.
+
+    Title popularity is skewed (a few titles get most revenue rows), as in
+    real box-office data. Files that already exist are reused.
+
+    Args:
+        out_dir (str): Directory for the generated files.
+        revenue_rows (int): Number of rows in the revenue CSV.
+        titles (int): Number of distinct movie titles.
+        seed (int): Seed for all generated values.
+
+    Returns:
+        dict: Paths of the "revenues" CSV and the "movies" NDJSON file.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {
+        "revenues": os.path.join(out_dir, f"revenues_{revenue_rows}_{titles}_{seed}.csv"),
+        "movies": os.path.join(out_dir, f"movies_{titles}_{seed}.ndjson"),
+    }
+    con = duckdb.connect()
+    try:
+        con.execute(f"""
+        CREATE TEMP TABLE titles AS
+        SELECT
+            i AS title_id,
+            CASE WHEN i % {DOTTED_EVERY} = 0 THEN 'Mr. ' ELSE '' END
+                || 'Synthetic Movie ' || lpad(i::VARCHAR, 7, '0') AS omdb_title,
+            CASE WHEN i % {DOTTED_EVERY} = 0 THEN 'Mr ' ELSE '' END
+                || 'Synthetic Movie ' || lpad(i::VARCHAR, 7, '0') AS revenue_title
+        FROM range({titles}) t(i)
+        """)
+
+        if not os.path.exists(paths["revenues"]):
+            con.execute(f"""
+            COPY (
+                SELECT
+                    md5(i::VARCHAR || '-{seed}') AS id,
+                    DATE '2000-01-01' + (hash(i, {seed}, 1) % 7300)::INT AS date,
+                    t.revenue_title AS title,
+                    1000 + (hash(i, {seed}, 2) % 2000000)::BIGINT AS revenue,
+                    1 + (hash(i, {seed}, 3) % 4000)::INT AS theaters,
+                    {_pick(DISTRIBUTORS, seed, 4)} AS distributor
+                FROM range({revenue_rows}) r(i)
+                JOIN titles t
+                  ON t.title_id = LEAST({titles - 1}, floor({titles} * pow({_uniform(seed, 5)}, 2)))::BIGINT
+                ORDER BY i
+            ) TO '{paths["revenues"]}' (HEADER, DELIMITER ',')
+            """)
+
+        if not os.path.exists(paths["movies"]):
+            people = max(10, titles // 2)
+            con.execute(f"""
+            COPY (
+                SELECT
+                    omdb_title AS Title,
+                    (2000 + hash(i, {seed}, 10) % 20)::VARCHAR AS Year,
+                    {_pick(RATINGS, seed, 11)} AS Rated,
+                    strftime(DATE '2000-01-01' + (hash(i, {seed}, 12) % 7300)::INT, '%d %b %Y') AS Released,
+                    (80 + hash(i, {seed}, 13) % 100)::VARCHAR || ' min' AS Runtime,
+                    array_to_string(list_distinct(list_transform(
+                        range(1 + (hash(i, {seed}, 14) % 3)::INT),
+                        g -> {_pick(GENRES, seed, 15, "i * 7 + g")})), ', ') AS Genre,
+                    'Director ' || (hash(i, {seed}, 16) % {people // 5 + 1})::VARCHAR AS Director,
+                    array_to_string(list_distinct(list_transform(
+                        range(1 + (hash(i, {seed}, 17) % 2)::INT),
+                        w -> 'Writer ' || (hash(i * 7 + w, {seed}, 18) % {people // 3 + 1})::VARCHAR)), ', ') AS Writer,
+                    array_to_string(list_distinct(list_transform(
+                        range(3),
+                        a -> 'Actor ' || (hash(i * 7 + a, {seed}, 19) % {people})::VARCHAR)), ', ') AS Actors,
+                    'Synthetic plot number ' || i::VARCHAR || '.' AS Plot,
+                    'English' AS Language,
+                    'United States' AS Country,
+                    (hash(i, {seed}, 20) % 30)::VARCHAR || ' wins' AS Awards,
+                    'N/A' AS Poster,
+                    [
+                        {{'Source': 'Internet Movie Database', 'Value': imdb_rating || '/10'}},
+                        {{'Source': 'Metacritic', 'Value': metascore || '/100'}}
+                    ] AS Ratings,
+                    metascore AS Metascore,
+                    imdb_rating AS imdbRating,
+                    format('{{:,}}', (hash(i, {seed}, 21) % 2000000)::BIGINT) AS imdbVotes,
+                    'tt' || lpad((1000000 + i)::VARCHAR, 8, '0') AS imdbID,
+                    'movie' AS Type,
+                    'N/A' AS DVD,
+                    CASE WHEN hash(i, {seed}, 22) % 10 = 0 THEN 'N/A'
+                         ELSE '$' || format('{{:,}}', (hash(i, {seed}, 23) % 500000000)::BIGINT) END AS BoxOffice,
+                    'N/A' AS Production,
+                    'N/A' AS Website,
+                    'True' AS Response
+                FROM (
+                    SELECT
+                        title_id AS i,
+                        omdb_title,
+                        round(1 + (hash(title_id, {seed}, 24) % 90) / 10.0, 1)::VARCHAR AS imdb_rating,
+                        (hash(title_id, {seed}, 25) % 101)::VARCHAR AS metascore
+                    FROM titles
+                    WHERE title_id % {MISSING_EVERY} <> {MISSING_EVERY - 1}
+                )
+                ORDER BY i
+            ) TO '{paths["movies"]}' (FORMAT JSON)
+            """)
+    finally:
+        con.close()
+    return paths
+
+
+def seed_response_cache(cache_path: str, movies_path: str, titles: int):
+    """
+    Fills a ResponseCache file with the synthetic OMDb records, keyed the way
+    BaseExtractor looks titles up, so a full pipeline run extracts without any
+    HTTP request. Titles without a record get cached "not found" answers.
+
+    Args:
+        cache_path (str): The cache database file.
+        movies_path (str): NDJSON written by generate_dataset().
+        titles (int): Number of distinct titles of the dataset.
+    """
+    ResponseCache(cache_path).close()
+    con = duckdb.connect(cache_path)
+    try:
+        con.execute(f"""
+        INSERT OR REPLACE INTO omdb_cache
+        WITH found AS (
+            SELECT json.Title AS title, to_json(json)::VARCHAR AS payload, true AS found
+            FROM read_json('{movies_path}', format = 'newline_delimited', records = false)
+        ),
+        missing AS (
+            SELECT 'Synthetic Movie ' || lpad(i::VARCHAR, 7, '0') AS title,
+                   '{{"Response": "False", "Error": "Movie not found!"}}' AS payload,
+                   false AS found
+            FROM range({titles}) t(i)
+            WHERE i % {MISSING_EVERY} = {MISSING_EVERY - 1}
+        )
+        SELECT 't=' || lower(replace(title, 'Mr. ', 'Mr ')), payload, found,
+               now(), now() + INTERVAL 30 DAY, now()
+        FROM (SELECT * FROM found UNION ALL SELECT * FROM missing)
+        """)
+    finally:
+        con.close()
@@ -1,6 +1,73 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
 from auth import BaseApiAuth
+from cache import ResponseCache
+from database import ExtendedDatabaseManager
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls evenly so that at most
+    `requests_per_second` calls are started per second.
+    """
+
+    def __init__(self, requests_per_second: float = None):
+        """
+        requests_per_second: Maximum call rate, None or 0 disables limiting.
+        """
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        """
+        Blocks the calling thread until its next free slot.
+        """
+        if not self.interval:
+            return
+        with self._lock:
+            slot = max(self._next_slot, time.monotonic())
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of a single OMDb lookup.
+
+    title: The requested title,
+    params: Query parameters sent to the API,
+    status_code: HTTP status code, None if the request never completed,
+    raw: Decoded JSON response, set for successful and "not found" lookups,
+    error: Failure description, None on success,
+    cached: True if the response was served from the ResponseCache.
+    """
+    title: str
+    params: dict
+    status_code: int = None
+    raw: dict = None
+    error: str = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.raw is not None
+
+    @property
+    def not_found(self) -> bool:
+        return self.raw is not None and self.raw.get("Response") == "False"
+
 
 class BaseExtractor:
     """
@@ -8,27 +75,48 @@ class BaseExtractor:
     from the OMDb API.
     """
 
-    def __init__(self,base_params: dict = None ):
+    def __init__(self, base_params: dict = None, max_workers: int = 8,
+                 requests_per_second: float = 10, cache: ResponseCache = None,
+                 db: ExtendedDatabaseManager = None, batch_size: int = 1000,
+                 url: str = None):
         """
         Initializes the extractor with base query parameters and API token.
 
-        base_params: Optional dictionary of additional query parameters.
+        base_params: Optional dictionary of additional query parameters,
+        max_workers: Maximum number of concurrent API requests,
+        requests_per_second: Upper bound on the request rate, None disables it,
+        cache: Optional ResponseCache consulted before any HTTP request,
+        db: Warehouse used to discover titles that still need to be fetched, not
+            opened here; only subclasses with their own title list may omit it,
+        batch_size: Maximum number of titles fetched per run, None fetches all,
+        url: API endpoint overriding BaseApiAuth's, e.g. a local OMDb stub.
         """
         auth = BaseApiAuth()
-        self.url = auth.full_url
+        self.url = url or auth.full_url
         self.token = auth.get_token()
         self.base_params = base_params or {}
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.cache = cache
+        self.db = db
+        self.batch_size = batch_size
+        self.failures = []
+        self.requests_made = 0
+
+        # one keep-alive session shared by all workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def fetch_titles_param(self):
         """
-        Fetches unique movie titles from a local CSV file (revenues_per_day.csv)
-        to be used as query parameters for the API requests.
+        Discovers movie titles from stg_Revenues that are not in the warehouse
+        yet, to be used as query parameters for the API requests.
 
-        :return: List of unique movie titles (limited to 5).
+        :return: List of new movie titles (at most batch_size).
         """
-        df = pd.read_csv("revenues_per_day.csv")
-        titles = df["title"].dropna().unique().tolist()
-        return titles[:5]
+        return self.db.find_new_titles(self.batch_size)
     
     def get_all_params(self):
         """
@@ -74,14 +162,239 @@ class BaseExtractor:
 
         return data
 
+    def _fetch_one(self, params: dict) -> FetchResult:
+        """
+        Performs a single rate-limited API request.
+
+        :param params: Query parameters for the request.
+
+        :return: FetchResult describing the response or the failure.
+        """
+        result = FetchResult(title=params.get("t"), params=params)
+        self.rate_limiter.wait()
+        try:
+            response = self.session.get(self.url, params=params, timeout=30)
+        except requests.RequestException as e:
+            result.error = f"request failed: {e}"
+            return result
+
+        result.status_code = response.status_code
+        if response.status_code != 200:
+            result.error = f"HTTP {response.status_code}"
+            return result
+        try:
+            raw = response.json()
+        except ValueError:
+            result.error = "invalid JSON in response"
+            return result
+        return self._apply_payload(result, raw)
+
+    def _apply_payload(self, result: FetchResult, raw) -> FetchResult:
+        """
+        Stores a decoded response on the result, turning "Response": "False"
+        payloads and non-dict bodies into errors.
+
+        :param result: The FetchResult to fill,
+        :param raw: Decoded JSON body.
+
+        :return: The updated FetchResult.
+        """
+        if not isinstance(raw, dict):
+            result.error = "unexpected response format"
+        elif raw.get("Response") == "False":
+            result.raw = raw
+            result.error = raw.get("Error", "lookup failed")
+        else:
+            result.raw = raw
+        return result
+
+    def fetch_results(self, all_params: list = None, max_requests: int = None):
+        """
+        Fetches all titles concurrently on a bounded thread pool.
+        Titles present in the cache are answered without an HTTP request,
+        fresh answers (including "not found" ones) are written back to it.
+
+        :param all_params: Query parameters to fetch, defaults to get_all_params(),
+        :param max_requests: Upper bound on HTTP requests, None for no limit.
+            Titles beyond it are neither fetched nor part of the result.
+
+        :return: List of FetchResult objects in the same order as the parameters.
+        """
+        if all_params is None:
+            all_params = self.get_all_params()
+        results = [None] * len(all_params)
+        to_fetch = list(range(len(all_params)))
+
+        if self.cache is not None:
+            cached = self.cache.get_many(all_params)
+            to_fetch = []
+            for idx, params in enumerate(all_params):
+                raw = cached.get(self.cache.key_for(params))
+                if raw is None:
+                    to_fetch.append(idx)
+                    continue
+                result = FetchResult(title=params.get("t"), params=params, cached=True)
+                results[idx] = self._apply_payload(result, raw)
+
+        if max_requests is not None:
+            to_fetch = to_fetch[:max(0, max_requests)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            fetched = executor.map(self._fetch_one, [all_params[idx] for idx in to_fetch])
+            for idx, result in zip(to_fetch, fetched):
+                results[idx] = result
+        self.requests_made += len(to_fetch)
+
+        if self.cache is not None:
+            self.cache.put_many([
+                (results[idx].params, results[idx].raw)
+                for idx in to_fetch
+                if results[idx].raw is not None
+            ])
+        return [result for result in results if result is not None]
+
+    def _report_failures(self, results: list):
+        """
+        Stores failed lookups in self.failures and prints a short summary.
+
+        :param results: FetchResult objects of the current run.
+        """
+        self.failures = [result for result in results if not result.ok]
+        if self.failures:
+            print(f"Failed to fetch {len(self.failures)} of {len(results)} titles:")
+            for failure in self.failures:
+                print(f"  {failure.title}: {failure.error}")
+
+    def spool_ndjson(self, file_path: str) -> int:
+        """
+        Fetches all titles and writes the successful raw responses to a
+        newline-delimited JSON file, one response per line, without flattening.
+
+        :param file_path: Destination of the NDJSON file.
+
+        :return: Number of responses written.
+        """
+        results = self.fetch_results()
+        self._report_failures(results)
+        return self._write_ndjson(results, file_path)
+
+    @staticmethod
+    def _write_ndjson(results: list, file_path: str) -> int:
+        """
+        Writes the raw responses of successful results to an NDJSON file.
+
+        :param results: FetchResult objects,
+        :param file_path: Destination of the NDJSON file.
+
+        :return: Number of responses written.
+        """
+        written = 0
+        with open(file_path, "w", encoding="utf-8") as f:
+            for result in results:
+                if result.ok:
+                    f.write(json.dumps(result.raw))
+                    f.write("\n")
+                    written += 1
+        return written
+
     def fetch_data(self):
-        all_params = self.get_all_params()
+        """
+        Fetches all titles and flattens the successful responses.
+        Failed lookups are printed and kept in self.failures.
+
+        :return: List of flattened records in title order.
+        """
+        results = self.fetch_results()
+        self._report_failures(results)
+        return [self._flatten_nested_dict(result.raw) for result in results if result.ok]
+
+
+class QueuedExtractor(BaseExtractor):
+    """
+    Extractor working through the persistent extraction queue in the warehouse
+    (omdb_extraction_queue) instead of a one-off list of titles.
+
+    Every run queues titles that are new in stg_Revenues and drains the queue
+    in batches, highest revenue first, until it is empty, the daily request
+    budget is used up or OMDb answers with 429. After every batch its raw
+    responses are landed in omdb_raw_responses and the outcomes written back
+    in one transaction, so an interrupted run resumes where it stopped without
+    fetching anything twice. Cached responses do not count against the budget.
+    """
+
+    def __init__(self, daily_budget: int = 1000, **kwargs):
+        """
+        daily_budget: Maximum number of OMDb requests per day, None disables the limit,
+        kwargs: Passed on to BaseExtractor.
+        """
+        super().__init__(**kwargs)
+        self.daily_budget = daily_budget
+
+    def fetch_titles_param(self):
+        """
+        Claims the next batch of queued titles.
+
+        :return: List of titles in priority order (at most batch_size).
+        """
+        return self.db.claim_extraction_batch(self.batch_size)
+
+    def remaining_budget(self):
+        """
+        :return: Requests still allowed today, None if unlimited.
+        """
+        if self.daily_budget is None:
+            return None
+        return max(0, self.daily_budget - self.db.api_requests_today())
+
+    def fetch_results(self):
+        """
+        Drains the extraction queue batch by batch within the request budget.
+
+        :return: List of FetchResult objects of all processed titles.
+        """
+        self.db.enqueue_new_titles()
         results = []
-        for params in all_params:
-            response = requests.get(self.url,params=params, timeout=30)
-            if response.status_code == 200:
-                raw = response.json()
-            if isinstance(raw, dict):
-                flat = self._flatten_nested_dict(raw)
-                results.append(flat)    
+        while True:
+            all_params = self.get_all_params()
+            if not all_params:
+                break
+            requests_before = self.requests_made
+            batch = super().fetch_results(all_params, self.remaining_budget())
+            self.db.record_api_requests(self.requests_made - requests_before)
+            self._land_batch(batch)
+            results.extend(batch)
+
+            if len(batch) < len(all_params):
+                print("Daily OMDb request budget used up, remaining titles stay queued.")
+                break
+            if any(result.status_code == 429 for result in batch):
+                print("OMDb rate limit reached, remaining titles stay queued.")
+                break
+        print(f"Extraction queue: {self.db.extraction_queue_summary()}, "
+              f"{self.requests_made} requests sent this run")
         return results
+
+    def _land_batch(self, batch: list):
+        """
+        Spools the successful responses of a batch to a temporary NDJSON file
+        and lands them together with the batch's queue outcomes.
+
+        :param batch: FetchResult objects of the batch.
+        """
+        spool_fd, spool_path = tempfile.mkstemp(suffix=".ndjson")
+        os.close(spool_fd)
+        try:
+            written = self._write_ndjson(batch, spool_path)
+            self.db.record_extraction_batch(batch, spool_path if written else None)
+        finally:
+            os.remove(spool_path)
+
+    def land_responses(self):
+        """
+        Drains the extraction queue, landing every batch as it completes.
+        Failed lookups are printed and kept in self.failures.
+
+        :return: Number of responses landed in omdb_raw_responses.
+        """
+        results = self.fetch_results()
+        self._report_failures(results)
+        return sum(1 for result in results if result.ok)
@@ -4,12 +4,22 @@ Module responsible for user authentication and database management.
 This module contains classes for:
 - Handling API authentication by retrieving tokens from environment variables.
 - Managing DuckDB database connections and operations such as executing SQL,
-  loading CSV files, and inserting data from pandas DataFrames.
+  loading CSV files, and inserting data from pandas DataFrames or Arrow data.
+- Sharing connections: one writer connection with per-thread cursors and a
+  bounded pool of read-only connections.
 """
 
+import copy
+import itertools
 import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import duckdb
+import pyarrow as pa
 
 
 class BaseApiAuth:
@@ -46,15 +56,84 @@ class BaseApiAuth:
 
 
 class DatabaseManager:
-    def __init__(self, dbname: str = "Movies.db"):
+    STATEMENT_CACHE_SIZE = 128
+    # parsed statements do not depend on a connection, so all managers share them
+    _statements = OrderedDict()
+    _statements_lock = threading.Lock()
+
+    def __init__(self, dbname: str = "Movies.db", raise_errors: bool = True,
+                 read_only: bool = False, conn=None):
         """
         Initializes a connection to the DuckDB database.
 
         Args:
             dbname (str): The database file name.
+            raise_errors (bool): Re-raise SQL errors after printing them. With
+                False, errors are only printed.
+            read_only (bool): Open the database in read-only mode.
+            conn (duckdb.DuckDBPyConnection, optional): Existing connection to use,
+                e.g. from a ConnectionManager. It is not closed by close_db().
         """
         self.dbname = dbname
-        self.conn = duckdb.connect(self.dbname)
+        self.raise_errors = raise_errors
+        self._owns_conn = conn is None
+        self.conn = conn if conn is not None else duckdb.connect(self.dbname, read_only=read_only)
+        self.instrumentation = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_db()
+
+    def cursor(self):
+        """
+        Returns a copy of this manager bound to a new cursor of the same
+        connection, for running statements from another thread.
+
+        Returns:
+            DatabaseManager: Manager of the same class using its own cursor.
+        """
+        clone = copy.copy(self)
+        clone.conn = self.conn.cursor()
+        clone._owns_conn = True
+        if self.instrumentation is not None:
+            self.instrumentation.attach(clone.conn)
+        return clone
+
+    def instrument(self, instrumentation):
+        """
+        Records every statement issued through execute_sql, query_sql,
+        load_csv_to_table, insert_from_df, insert_from_arrow and the
+        subclasses' _run/_fetch calls in `instrumentation`. Cursors
+        created afterwards are instrumented too.
+
+        Args:
+            instrumentation (Instrumentation): Collector of the run's metrics.
+        """
+        instrumentation.attach(self.conn)
+        self.instrumentation = instrumentation
+
+    def _run(self, method: str, sql: str, bytes_read: int = None, params: list = None):
+        """
+        Executes one or more statements (a single one when `params` are given),
+        through the instrumentation if attached.
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.execute(self.conn, method, sql, bytes_read, params)
+        elif params is None:
+            self.conn.sql(sql)
+        else:
+            self.conn.execute(sql, params)
+
+    def _fetch(self, method: str, sql: str, params: list = None) -> list:
+        """
+        Executes a single statement and returns all result rows, through the
+        instrumentation if attached.
+        """
+        if self.instrumentation is not None:
+            return self.instrumentation.fetch(self.conn, method, sql, params)
+        return self.conn.execute(sql, params).fetchall()
 
     def execute_sql(self, sql: str, success_msg: str = None):
         """
@@ -65,11 +144,13 @@ class DatabaseManager:
             success_msg (str, optional): Message to print upon successful execution.
         """
         try:
-            self.conn.sql(sql)
+            self._run("execute_sql", sql)
             if success_msg:
                 print(success_msg)
         except Exception as e:
             print(f"Error: {e}")
+            if self.raise_errors:
+                raise
 
     def query_sql(self, sql: str):
         """
@@ -82,11 +163,59 @@ class DatabaseManager:
             pd.DataFrame: Query result as a DataFrame.
         """
         try:
-            result = self.conn.sql(sql).fetchdf()
-            return result
+            if self.instrumentation is None:
+                return self.conn.sql(sql).fetchdf()
+            return self.instrumentation.query(self.conn, "query_sql", sql)
         except Exception as e:
             print(f"Error during SELECT: {e}")
-            return result
+            if self.raise_errors:
+                raise
+            return None
+
+    def _prepare(self, sql: str):
+        """
+        Returns the parsed statement for a SQL template, parsing it only on
+        first use. Up to STATEMENT_CACHE_SIZE templates are kept (LRU).
+        """
+        with self._statements_lock:
+            statement = self._statements.get(sql)
+            if statement is not None:
+                self._statements.move_to_end(sql)
+                return statement
+
+        statements = self.conn.extract_statements(sql)
+        if len(statements) != 1:
+            raise ValueError("query() accepts exactly one SQL statement")
+        with self._statements_lock:
+            self._statements[sql] = statements[0]
+            if len(self._statements) > self.STATEMENT_CACHE_SIZE:
+                self._statements.popitem(last=False)
+        return statements[0]
+
+    def query(self, sql: str, params: dict = None, output: str = "pandas"):
+        """
+        Executes a parameterized query. Values are bound to named
+        placeholders ($name), never formatted into the SQL text, and each
+        distinct SQL template is parsed once and reused afterwards.
+
+        Args:
+            sql (str): A single SQL statement with $name placeholders.
+            params (dict, optional): Values for the placeholders.
+            output (str): "pandas" for a DataFrame or "arrow" for a pyarrow.Table.
+
+        Returns:
+            pd.DataFrame | pyarrow.Table: The query result.
+        """
+        if output not in ("pandas", "arrow"):
+            raise ValueError(f"Unsupported output format: {output}")
+        result = self.conn.execute(self._prepare(sql), params or {})
+        if output == "pandas":
+            return result.fetchdf()
+        table = result.arrow()
+        # newer DuckDB releases return a reader instead of a table
+        if isinstance(table, pa.RecordBatchReader):
+            table = table.read_all()
+        return table
 
     def load_csv_to_table(self, table_name: str, file_path: str):
         """
@@ -97,14 +226,16 @@ class DatabaseManager:
             file_path (str): The path to the CSV file.
         """
         try:
-            self.conn.execute(f"""
+            self._run("load_csv_to_table", f"""
                 DELETE FROM {table_name};
-                INSERT INTO {table_name}
+                INSERT INTO {table_name} BY NAME
                 SELECT * FROM read_csv_auto('{file_path}')
             """)
             print(f"Data successfully loaded into {table_name}")
         except Exception as e:
             print(f"Error during loading data into {table_name}: {e}")
+            if self.raise_errors:
+                raise
 
     def register_df(self, name: str, df):
         """
@@ -124,16 +255,264 @@ class DatabaseManager:
             table (str): The table name to insert data into.
             df (pandas.DataFrame): The DataFrame containing data to insert.
         """
-        self.register_df("temp_df", df)
+        name = f"temp_df_{uuid.uuid4().hex}"
+        self.register_df(name, df)
         try:
-            self.conn.sql(f"""
-            DELETE FROM {table};
-            INSERT INTO {table} BY NAME SELECT * FROM temp_df
-            """)
+            self._run("insert_from_df", f"DELETE FROM {table}")
+            self._run("insert_from_df", f"INSERT INTO {table} BY NAME SELECT * FROM {name}",
+                      bytes_read=int(df.memory_usage(index=False).sum()))
+            print(f"Inserted data into {table}")
+        except Exception as e:
+            print(f"Insert error into {table}: {e}")
+            if self.raise_errors:
+                raise
+        finally:
+            self.conn.unregister(name)
+
+    def insert_from_arrow(self, table: str, data, replace: bool = True):
+        """
+        Streams Arrow data into an existing table without converting it to pandas.
+
+        Args:
+            table (str): The table name to insert data into.
+            data: A pyarrow.Table, pyarrow.RecordBatchReader, pyarrow.RecordBatch
+                or any iterable (e.g. a generator) of RecordBatches sharing one schema.
+            replace (bool): If True, existing rows are deleted first,
+                like insert_from_df does.
+        """
+        if isinstance(data, pa.RecordBatch):
+            data = [data]
+        if not isinstance(data, (pa.Table, pa.RecordBatchReader)):
+            batches = iter(data)
+            first = next(batches, None)
+            if first is None:
+                if replace:
+                    self.execute_sql(f"DELETE FROM {table}")
+                print(f"No data to insert into {table}")
+                return
+            data = pa.RecordBatchReader.from_batches(
+                first.schema, itertools.chain([first], batches)
+            )
+
+        name = f"temp_arrow_{uuid.uuid4().hex}"
+        self.conn.register(name, data)
+        try:
+            delete_sql = f"DELETE FROM {table};" if replace else ""
+            self._run("insert_from_arrow", f"""
+            {delete_sql}
+            INSERT INTO {table} BY NAME SELECT * FROM {name}
+            """, bytes_read=data.nbytes if isinstance(data, pa.Table) else None)
             print(f"Inserted data into {table}")
         except Exception as e:
             print(f"Insert error into {table}: {e}")
+            if self.raise_errors:
+                raise
+        finally:
+            self.conn.unregister(name)
+
+    def register_parquet_views(self, root: str = "parquet"):
+        """
+        Creates a view per table exported to Parquet under `root`, so the same
+        SQL used against the warehouse runs against the files. Hive partition
+        columns (year, month) are exposed as columns, and filters on them
+        prune whole partitions.
+
+        Args:
+            root (str): Directory written by export_to_parquet().
+
+        Returns:
+            list: Names of the created views.
+        """
+        views = []
+        for entry in sorted(os.listdir(root)):
+            path = os.path.join(root, entry)
+            if os.path.isdir(path):
+                name = entry
+                source = (f"read_parquet('{path}/**/*.parquet', "
+                          f"hive_partitioning = true, hive_types_autocast = true)")
+            elif entry.endswith(".parquet"):
+                name = entry[:-len(".parquet")]
+                source = f"read_parquet('{path}')"
+            else:
+                continue
+            self.conn.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM {source}")
+            views.append(name)
+        return views
+
+    def compact_to(self, path: str):
+        """
+        Writes a compacted copy of the whole database (tables, sequences,
+        indexes and views) to a new file. DuckDB reuses the blocks freed by
+        deletes but never shrinks a file, so replacing the file with this copy
+        is the way to give the space back.
+
+        The catalog is replayed in dependency order (tables referenced by
+        foreign keys first), as COPY FROM DATABASE copies tables by name and
+        trips over the bridge tables' foreign keys. Sequences continue after
+        their last value.
+
+        Args:
+            path (str): Destination file, replaced if it exists.
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        name = self.conn.execute("SELECT current_database()").fetchone()[0]
+        sequences = self.conn.execute("""
+            SELECT sequence_name, increment_by, last_value, sql FROM duckdb_sequences()
+            WHERE database_name = current_database() AND NOT temporary
+        """).fetchall()
+        tables = self.conn.execute("""
+            SELECT t.table_name, t.sql FROM duckdb_tables() t
+            WHERE t.database_name = current_database() AND NOT t.temporary
+            ORDER BY EXISTS (
+                SELECT 1 FROM duckdb_constraints() c
+                WHERE c.database_name = t.database_name AND c.table_name = t.table_name
+                AND c.constraint_type = 'FOREIGN KEY'
+            ), t.table_oid
+        """).fetchall()
+        indexes = self.conn.execute("""
+            SELECT sql FROM duckdb_indexes()
+            WHERE database_name = current_database() AND sql IS NOT NULL
+        """).fetchall()
+        views = self.conn.execute("""
+            SELECT sql FROM duckdb_views()
+            WHERE database_name = current_database() AND NOT internal AND NOT temporary
+        """).fetchall()
+
+        statements = [f"ATTACH '{path}' AS compacted;", "USE compacted;"]
+        for sequence, increment, last_value, ddl in sequences:
+            if last_value is not None:
+                ddl = f"CREATE SEQUENCE {sequence} INCREMENT BY {increment} START {last_value + increment};"
+            statements.append(ddl)
+        statements += [ddl for _, ddl in tables]
+        statements += [
+            f'INSERT INTO compacted.main."{table}" SELECT * FROM "{name}".main."{table}";'
+            for table, _ in tables
+        ]
+        statements += [ddl for ddl, in indexes]
+        statements += [ddl for ddl, in views]
+        statements += [f'USE "{name}";', "DETACH compacted;"]
+        try:
+            self.execute_sql("\n".join(statements), f"Compacted copy written to {path}")
+        except Exception:
+            self.conn.execute(f'USE "{name}"')
+            self.conn.execute("DETACH DATABASE IF EXISTS compacted")
+            raise
 
     def close_db(self):
-        self.conn.close()
+        if self._owns_conn:
+            self.conn.close()
+
+
+class ConnectionManager:
+    """
+    Owns the DuckDB connections of one database file.
+
+    Pipeline steps share a single writer connection (StepScheduler runs each
+    step on its own cursor, see DatabaseManager.cursor), while readers such as the dashboard borrow connections from a bounded
+    pool of read_only=True connections. DuckDB does not allow read-only and
+    read-write connections to the same file in one process, so a process uses
+    either the writer or the reader pool.
+
+    Args:
+        dbname: The database file name
+        read_pool_size: Maximum number of read-only connections
+        read_timeout: Seconds reader() waits for a free connection when the pool is exhausted
+    """
+
+    def __init__(self, dbname: str = "Movies.db", read_pool_size: int = 4, read_timeout: float = 30):
+        self.dbname = dbname
+        self.read_pool_size = read_pool_size
+        self.read_timeout = read_timeout
+        self._writer = None
+        self._lock = threading.Lock()
+        self._idle_readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._closed = False
+
+    def writer(self):
+        """
+        Returns the shared read-write connection, opening it on first use.
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = duckdb.connect(self.dbname)
+            return self._writer
+
+    def manager(self, manager_cls=None, **kwargs):
+        """
+        Returns a DatabaseManager (or subclass) working on the writer connection.
+        """
+        manager_cls = manager_cls or DatabaseManager
+        return manager_cls(self.dbname, conn=self.writer(), **kwargs)
+
+    @contextmanager
+    def reader(self, manager_cls=None):
+        """
+        Borrows a read-only connection from the pool, wrapped in a manager.
+        Waits up to read_timeout seconds while all read_pool_size connections
+        are in use. A connection that cannot be opened (missing file, file
+        locked by a writer) does not use up a pool slot.
+
+        Args:
+            manager_cls: DatabaseManager subclass to wrap the connection in.
+
+        Raises:
+            TimeoutError: If no connection became free within read_timeout.
+        """
+        try:
+            conn = self._idle_readers.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._reader_count < self.read_pool_size
+                if can_open:
+                    self._reader_count += 1
+            if can_open:
+                try:
+                    conn = duckdb.connect(self.dbname, read_only=True)
+                except Exception:
+                    with self._lock:
+                        self._reader_count -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle_readers.get(timeout=self.read_timeout)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f"No read-only connection to {self.dbname} became free "
+                        f"within {self.read_timeout}s"
+                    ) from None
+
+        manager_cls = manager_cls or DatabaseManager
+        try:
+            yield manager_cls(self.dbname, conn=conn)
+        finally:
+            # connections borrowed while the manager was closed are not pooled again
+            if self._closed:
+                conn.close()
+            else:
+                self._idle_readers.put(conn)
+
+    def close(self):
+        """
+        Closes the writer and all idle pooled readers. Readers borrowed at
+        that moment are closed when they are given back.
+        """
+        with self._lock:
+            self._closed = True
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._idle_readers.get_nowait().close()
+            except queue.Empty:
+                break
+        self._reader_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
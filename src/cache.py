@@ -0,0 +1,166 @@
+"""
+Module providing a persistent cache for OMDb API responses.
+
+Responses are stored in a small DuckDB file next to the warehouse so that
+reruns of the pipeline can skip HTTP calls for titles fetched recently.
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta
+
+import duckdb
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of OMDb responses with per-entry TTL, LRU eviction
+    and negative caching of "Response": "False" lookups.
+
+    Entries are keyed by the normalized query parameters (the API key is
+    ignored). Successful lookups are additionally stored under their imdbID
+    so that later `i=` queries hit the same entry.
+    """
+
+    def __init__(self, dbname: str = "omdb_cache.db", ttl_days: float = 30,
+                 negative_ttl_days: float = 1, max_entries: int = 100_000):
+        """
+        Opens (and creates if needed) the cache database.
+
+        Args:
+            dbname (str): The cache database file name.
+            ttl_days (float): Lifetime of successful responses.
+            negative_ttl_days (float): Lifetime of "not found" responses.
+            max_entries (int): Maximum number of entries kept before the least
+                recently used ones are evicted.
+        """
+        self.dbname = dbname
+        self.ttl = timedelta(days=ttl_days)
+        self.negative_ttl = timedelta(days=negative_ttl_days)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self._lock = threading.Lock()
+        self.conn = duckdb.connect(self.dbname)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS omdb_cache (
+                cache_key VARCHAR PRIMARY KEY,
+                payload VARCHAR NOT NULL,
+                found BOOLEAN NOT NULL,
+                fetched_at TIMESTAMP NOT NULL,
+                expires_at TIMESTAMP NOT NULL,
+                last_access TIMESTAMP NOT NULL
+            )
+        """)
+
+    @staticmethod
+    def key_for(params: dict) -> str:
+        """
+        Builds a cache key from request parameters.
+
+        Titles and ids are lower-cased and whitespace-collapsed, parameters are
+        sorted and the API key is left out.
+
+        Args:
+            params (dict): Query parameters of an OMDb request.
+
+        Returns:
+            str: The normalized cache key.
+        """
+        parts = []
+        for name in sorted(params):
+            if name == "apikey":
+                continue
+            value = " ".join(str(params[name]).split()).lower()
+            parts.append(f"{name}={value}")
+        return "&".join(parts)
+
+    def get_many(self, params_list: list) -> dict:
+        """
+        Looks up several requests at once and refreshes their LRU timestamps.
+
+        Args:
+            params_list (list): Query parameter dictionaries.
+
+        Returns:
+            dict: Mapping of cache key to the cached response for every
+            non-expired entry found.
+        """
+        keys = list({self.key_for(params) for params in params_list})
+        if not keys:
+            return {}
+        now = datetime.now()
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT cache_key, payload, found
+                FROM omdb_cache
+                WHERE cache_key IN (SELECT UNNEST(?)) AND expires_at > ?
+            """, [keys, now]).fetchall()
+            found_keys = [row[0] for row in rows]
+            if found_keys:
+                self.conn.execute("""
+                    UPDATE omdb_cache SET last_access = ?
+                    WHERE cache_key IN (SELECT UNNEST(?))
+                """, [now, found_keys])
+
+            self.hits += len(rows)
+            self.negative_hits += sum(1 for row in rows if not row[2])
+            self.misses += len(keys) - len(rows)
+        return {key: json.loads(payload) for key, payload, _ in rows}
+
+    def put_many(self, entries: list):
+        """
+        Stores responses and evicts the least recently used entries when the
+        cache grows past max_entries.
+
+        Args:
+            entries (list): Pairs of (params, raw response dict).
+        """
+        now = datetime.now()
+        rows = []
+        for params, raw in entries:
+            found = raw.get("Response") != "False"
+            expires_at = now + (self.ttl if found else self.negative_ttl)
+            payload = json.dumps(raw)
+            rows.append((self.key_for(params), payload, found, now, expires_at, now))
+            if found and raw.get("imdbID"):
+                alias = {k: v for k, v in params.items() if k != "t"}
+                alias["i"] = raw["imdbID"]
+                rows.append((self.key_for(alias), payload, found, now, expires_at, now))
+        if not rows:
+            return
+
+        with self._lock:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO omdb_cache
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.evict()
+
+    def evict(self):
+        """
+        Removes expired entries and trims the cache down to max_entries.
+        """
+        self.conn.execute("DELETE FROM omdb_cache WHERE expires_at <= ?", [datetime.now()])
+        self.conn.execute("""
+            DELETE FROM omdb_cache
+            WHERE cache_key IN (
+                SELECT cache_key FROM omdb_cache
+                ORDER BY last_access DESC
+                OFFSET ?
+            )
+        """, [self.max_entries])
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters collected since the cache was opened.
+        """
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -1,64 +1,205 @@
+import os
+import threading
+from contextlib import contextmanager
+
 import pandas as pd
 import altair as alt
 import streamlit as st
-from auth import DatabaseManager
+from auth import ConnectionManager, DatabaseManager
+from database import ExtendedDatabaseManager
+from snapshot import resolve_database
+
+SNAPSHOT_DIR = "warehouse"
+DEFAULT_DATABASE = "Movies.db"
+
+
+@st.cache_resource
+def _connection_registry() -> dict:
+    """
+    Server-wide holder of the reader pool of the snapshot being served.
+    """
+    return {"lock": threading.Lock(), "dbname": None, "connections": None}
+
+
+def get_connections(dbname: str) -> ConnectionManager:
+    """
+    Shared pool of read-only connections to the served snapshot, created once
+    per Streamlit server and snapshot. When a newer snapshot is published the
+    pool of the previous one is closed, so its connections (and the disk
+    space of the file once it is pruned) are released.
+    """
+    registry = _connection_registry()
+    with registry["lock"]:
+        if registry["dbname"] != dbname:
+            if registry["connections"] is not None:
+                registry["connections"].close()
+            registry["dbname"] = dbname
+            registry["connections"] = ConnectionManager(dbname, read_pool_size=4)
+        return registry["connections"]
+
+
+@contextmanager
+def open_reader(manager_cls=DatabaseManager):
+    """
+    Yields a read-only manager for the database being served. Published
+    snapshots are never written again, so their connections are pooled for
+    the life of the server. Movies.db is loaded in place by the ETL, which
+    needs an exclusive lock, so it is only held open for a single query.
+    """
+    if serving_snapshot:
+        # sessions run on separate threads, so each query borrows its own pooled connection
+        with get_connections(dbname).reader(manager_cls) as db:
+            yield db
+    else:
+        with manager_cls(dbname, read_only=True) as db:
+            yield db
+
+
+def run_query(sql: str, params: dict = None) -> pd.DataFrame:
+    with open_reader() as db:
+        return db.query(sql, params)
+
+
+# rankings read the pre-aggregated revenue rollups instead of fact_revenue;
+# a NULL parameter disables its filter, so each ranking is a single template
+TOP_MOVIES_SQL = """
+SELECT 
+    m.title,
+    SUM(a.total_revenue) AS total_revenue
+FROM agg_revenue_movie_year a
+JOIN dim_movies m ON a.movie_id = m.movie_id
+WHERE ($year::INT IS NULL OR a.year = $year)
+AND ($genre::VARCHAR IS NULL OR a.movie_id IN (
+    SELECT bmg.movie_id
+    FROM Bridge_Movie_Genre bmg
+    JOIN Dim_Genre g ON bmg.genre_id = g.genre_id
+    WHERE g.genre_name = $genre
+))
+GROUP BY m.title
+ORDER BY total_revenue DESC
+LIMIT 10
+"""
+
+TOP_GENRES_SQL = """
+SELECT 
+    g.genre_name,
+    SUM(a.total_revenue) AS total_revenue
+FROM agg_revenue_genre_year a
+JOIN Dim_Genre g ON a.genre_id = g.genre_id
+WHERE ($year::INT IS NULL OR a.year = $year)
+AND ($genre::VARCHAR IS NULL OR g.genre_name = $genre)
+GROUP BY g.genre_name
+ORDER BY total_revenue DESC
+LIMIT 10
+"""
+
+# box office and rating rankings read the typed movie attributes; the year
+# filter applies to the release date
+TOP_BOX_OFFICE_SQL = """
+SELECT
+    m.title,
+    m.box_office
+FROM dim_movies m
+WHERE m.box_office IS NOT NULL
+AND ($year::INT IS NULL OR year(m.released_date) = $year)
+AND ($genre::VARCHAR IS NULL OR m.movie_id IN (
+    SELECT bmg.movie_id
+    FROM Bridge_Movie_Genre bmg
+    JOIN Dim_Genre g ON bmg.genre_id = g.genre_id
+    WHERE g.genre_name = $genre
+))
+ORDER BY m.box_office DESC
+LIMIT 10
+"""
+
+TOP_RATED_SQL = """
+SELECT
+    m.title,
+    m.imdb_rating,
+    m.imdb_votes
+FROM dim_movies m
+WHERE m.imdb_rating IS NOT NULL
+AND ($year::INT IS NULL OR year(m.released_date) = $year)
+AND ($genre::VARCHAR IS NULL OR m.movie_id IN (
+    SELECT bmg.movie_id
+    FROM Bridge_Movie_Genre bmg
+    JOIN Dim_Genre g ON bmg.genre_id = g.genre_id
+    WHERE g.genre_name = $genre
+))
+ORDER BY m.imdb_rating DESC, m.imdb_votes DESC NULLS LAST
+LIMIT 10
+"""
 
-db = DatabaseManager("Movies.db")
+# ranking type -> (query, label column, value column, value axis title)
+RANKINGS = {
+    "Top Movies": (TOP_MOVIES_SQL, "title", "total_revenue", "Total Revenue"),
+    "Top Genres": (TOP_GENRES_SQL, "genre_name", "total_revenue", "Total Revenue"),
+    "Top Box Office": (TOP_BOX_OFFICE_SQL, "title", "box_office", "Box Office (USD)"),
+    "Top Rated": (TOP_RATED_SQL, "title", "imdb_rating", "IMDb Rating"),
+}
+
+
+@st.cache_data
+def load_filters(load_version: int):
+    """
+    Returns the genre and year filter values; cached per warehouse load version.
+    """
+    genres = run_query("SELECT DISTINCT genre_name FROM Dim_Genre ORDER BY genre_name")["genre_name"].tolist()
+    years = run_query("SELECT DISTINCT year FROM dim_date ORDER BY year")["year"].tolist()
+    return genres, years
+
+
+@st.cache_data
+def load_ranking(rank_type: str, selected_genre: str, selected_year: str, load_version: int):
+    """
+    Returns the top 10 ranking for the given filters; cached per filter values
+    and warehouse load version.
+    """
+    params = {
+        "genre": None if selected_genre == "All" else selected_genre,
+        "year": None if selected_year == "All" else int(selected_year),
+    }
+    return run_query(RANKINGS[rank_type][0], params)
+
+
+def last_modified(path: str) -> float:
+    """
+    Latest modification time of a database file and its WAL, 0 if neither exists.
+    """
+    return max(
+        (os.path.getmtime(file_path) for file_path in (path, path + ".wal") if os.path.exists(file_path)),
+        default=0.0,
+    )
+
+
+@st.cache_data
+def get_load_version(dbname: str, modified: float) -> int:
+    """
+    Returns the warehouse load version; cached per database file and its
+    modification time, so reruns only open a connection after a load wrote
+    to the file (published snapshots never change).
+    """
+    with open_reader(ExtendedDatabaseManager) as db:
+        return db.get_load_version()
+
+
+# readers always open the latest published snapshot (or Movies.db without snapshots)
+dbname = resolve_database(SNAPSHOT_DIR, DEFAULT_DATABASE)
+serving_snapshot = dbname != DEFAULT_DATABASE
+
+# the load version changes only when the ETL finishes, so it keys every cache below
+load_version = get_load_version(dbname, last_modified(dbname))
 
 # Preparing data and filters
-genres = db.query_sql("SELECT DISTINCT genre_name FROM Dim_Genre ORDER BY genre_name")["genre_name"].tolist()
-years = db.query_sql("SELECT DISTINCT year FROM dim_date ORDER BY year")["year"].tolist()
+genres, years = load_filters(load_version)
 
 #  Streamlit UI filters
 selected_genre = st.selectbox("Filter by Genre", ["All"] + genres)
 selected_year = st.selectbox("Filter by Year", ["All"] + [str(y) for y in years])
 
-rank_type = st.radio("Ranking Type", ["Top Movies", "Top Genres"])
-
-# Dynamic where clause based on filter
-conditions = []
-if selected_genre != "All":
-    conditions.append(f"g.genre_name = '{selected_genre}'")
-if selected_year != "All":
-    conditions.append(f"d.year = {selected_year}")
-
-where_clause = " AND ".join(conditions)
-if where_clause:
-    where_clause = "WHERE " + where_clause
-
-# SQL query depending on selected ranking type
-if rank_type == "Top Movies":
-    query = f"""
-    SELECT 
-        m.title,
-        SUM(fr.revenue) AS total_revenue
-    FROM fact_revenue fr
-    JOIN dim_movies m ON fr.movie_id = m.movie_id
-    JOIN Bridge_Movie_Genre bmg ON m.movie_id = bmg.movie_id
-    JOIN Dim_Genre g ON bmg.genre_id = g.genre_id
-    JOIN dim_date d ON fr.date_id = d.date_id
-    {where_clause}
-    GROUP BY m.title
-    ORDER BY total_revenue DESC
-    LIMIT 10;
-    """
-else:
-    query = f"""
-    SELECT 
-        g.genre_name,
-        SUM(fr.revenue) AS total_revenue
-    FROM fact_revenue fr
-    JOIN dim_movies m ON fr.movie_id = m.movie_id
-    JOIN Bridge_Movie_Genre bmg ON m.movie_id = bmg.movie_id
-    JOIN Dim_Genre g ON bmg.genre_id = g.genre_id
-    JOIN dim_date d ON fr.date_id = d.date_id
-    {where_clause}
-    GROUP BY g.genre_name
-    ORDER BY total_revenue DESC
-    LIMIT 10;
-    """
+rank_type = st.radio("Ranking Type", list(RANKINGS))
 
-df = db.query_sql(query)
+df = load_ranking(rank_type, selected_genre, selected_year, load_version)
 
 # # # # # # #
 # DASHBOARD #
@@ -67,18 +208,16 @@ st.title("Movie Revenue Rankings")
 
 st.dataframe(df)
 
-label = "title" if rank_type == "Top Movies" else "genre_name"
+_, label, value, value_title = RANKINGS[rank_type]
 
 chart = alt.Chart(df).mark_bar().encode(
     x=alt.X(f'{label}:N', sort='-y', title="Movie" if label == "title" else "Genre"),
-    y=alt.Y('total_revenue:Q', title="Total Revenue"),
-    tooltip=[label, 'total_revenue']
+    y=alt.Y(f'{value}:Q', title=value_title),
+    tooltip=[label, value]
 ).properties(
     width=700,
     height=400,
-    title=f'{rank_type} by Revenue'
+    title=f'{rank_type} by {value_title}'
 )
 
 st.altair_chart(chart, use_container_width=True)
-
-db.close_db()
@@ -3,8 +3,98 @@ Module extending DatabaseManager to include methods for creating and inserting s
 dimension, and fact tables specific to the movie database schema.
 """
 
+import glob
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
 from auth import DatabaseManager
 
+# scalar OMDb response fields stored 1:1 in stg_Movies
+OMDB_FIELDS = [
+    "Title", "Year", "Rated", "Released", "Runtime", "Genre", "Director", "Writer",
+    "Actors", "Plot", "Language", "Country", "Awards", "Poster", "Metascore",
+    "imdbRating", "imdbVotes", "imdbID", "Type", "DVD", "BoxOffice", "Production",
+    "Website", "Response",
+]
+# number of Ratings entries kept as Ratings_N_Source / Ratings_N_Value columns
+OMDB_RATING_SLOTS = 3
+
+# typed movie attributes parsed in bulk from the OMDb strings: column -> (type, SQL
+# expression over the raw stg_Movies columns); "N/A" and unparsable values become NULL
+OMDB_TYPED_COLUMNS = {
+    "runtime_minutes": ("INTEGER", "TRY_CAST(regexp_extract(Runtime, '^\\s*(\\d+)', 1) AS INTEGER)"),
+    "released_date": ("DATE", "CAST(TRY_STRPTIME(NULLIF(Released, 'N/A'), '%d %b %Y') AS DATE)"),
+    "metacritic": ("SMALLINT", "TRY_CAST(NULLIF(Metascore, 'N/A') AS SMALLINT)"),
+    "imdb_rating": ("DECIMAL(3, 1)", "TRY_CAST(NULLIF(imdbRating, 'N/A') AS DECIMAL(3, 1))"),
+    "imdb_votes": ("INTEGER", "TRY_CAST(REPLACE(NULLIF(imdbVotes, 'N/A'), ',', '') AS INTEGER)"),
+    "box_office": ("BIGINT", "TRY_CAST(regexp_replace(NULLIF(BoxOffice, 'N/A'), '[$,]', '', 'g') AS BIGINT)"),
+    "rotten_tomatoes": ("SMALLINT", "TRY_CAST(RTRIM(COALESCE({rt_values}), '%') AS SMALLINT)".format(
+        rt_values=", ".join(
+            f"CASE WHEN Ratings_{idx}_Source = 'Rotten Tomatoes' THEN Ratings_{idx}_Value END"
+            for idx in range(OMDB_RATING_SLOTS)
+        ))),
+}
+
+# OMDb extraction queue: failed titles are retried after
+# EXTRACTION_BACKOFF_SECONDS * 2^attempts (capped), at most EXTRACTION_MAX_ATTEMPTS times
+EXTRACTION_MAX_ATTEMPTS = 5
+EXTRACTION_BACKOFF_SECONDS = 60
+EXTRACTION_MAX_BACKOFF_SECONDS = 24 * 60 * 60
+
+# calendar always covered by dim_date; extended further when revenues fall outside
+DIM_DATE_START = "2000-01-01"
+DIM_DATE_END = "2030-12-31"
+
+
+# dim_movies attributes updated from stg_Movies and covered by its content_hash; the
+# keys (imdb_id, title_key) are never updated, as DuckDB rewrites rows with changed
+# indexed columns as delete + insert, which the bridge foreign keys reject
+DIM_MOVIE_COLUMNS = ["title", "year", "rated", "released", "runtime", *OMDB_TYPED_COLUMNS]
+
+
+def title_key_sql(column: str) -> str:
+    """
+    Returns the SQL expression normalizing a movie title into the title_key
+    used for every movie lookup: lower-cased, trimmed and without dots.
+    """
+    return f"LOWER(TRIM(REPLACE({column}, '.', '')))"
+
+
+def typed_columns_ddl(table: str) -> str:
+    """
+    Returns the ALTER TABLE statements adding the OMDB_TYPED_COLUMNS to a table.
+    """
+    return "\n        ".join(
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {dtype};"
+        for column, (dtype, _) in OMDB_TYPED_COLUMNS.items()
+    )
+
+
+# multi-valued OMDb fields exploded into stg_Movie_Roles, with the dimension
+# and bridge tables derived from each role; strip_dots also removes dots from
+# the stored dimension name
+ROLE_DIMENSIONS = {
+    "genre": {
+        "source": "Genre", "table": "Dim_Genre", "id": "genre_id",
+        "name": "genre_name", "bridge": "Bridge_Movie_Genre", "strip_dots": True,
+    },
+    "director": {
+        "source": "Director", "table": "Dim_Director", "id": "director_id",
+        "name": "director_name", "bridge": "Bridge_Movie_Director", "strip_dots": False,
+    },
+    "writer": {
+        "source": "Writer", "table": "Dim_Writer", "id": "writer_id",
+        "name": "writer_name", "bridge": "Bridge_Movie_Writer", "strip_dots": False,
+    },
+    "actor": {
+        "source": "Actors", "table": "Dim_Actor", "id": "actor_id",
+        "name": "actor_name", "bridge": "Bridge_Movie_Actor", "strip_dots": False,
+    },
+}
+
 
 # # # # # # # # # # #
 #Creating warehouse #
@@ -21,6 +111,9 @@ class ExtendedDatabaseManager(DatabaseManager):
         """
         Creates staging tables in the database to temporarily hold raw
         movie and revenue data before transformation.
+
+        Raw OMDb responses are archived once per imdbID in omdb_raw_responses;
+        stg_Movies is a projection of that archive (see refresh_stg_movies).
         """
         sql = """
         CREATE TABLE IF NOT EXISTS stg_Revenues (
@@ -63,7 +156,56 @@ class ExtendedDatabaseManager(DatabaseManager):
             Website VARCHAR,
             Response VARCHAR
         );
-        """
+        CREATE TABLE IF NOT EXISTS stg_Movie_Roles (
+            movie_key VARCHAR NOT NULL,
+            role VARCHAR NOT NULL,
+            name VARCHAR NOT NULL
+        );
+        ALTER TABLE stg_Revenues ADD COLUMN IF NOT EXISTS batch_id INT;
+        ALTER TABLE stg_Revenues ADD COLUMN IF NOT EXISTS title_key VARCHAR;
+        ALTER TABLE stg_Movies ADD COLUMN IF NOT EXISTS title_key VARCHAR;
+        {stg_typed_columns}
+        UPDATE stg_Revenues SET title_key = {revenues_key} WHERE title_key IS NULL;
+        UPDATE stg_Movies SET title_key = {movies_key} WHERE title_key IS NULL;
+        CREATE INDEX IF NOT EXISTS idx_stg_revenues_title_key ON stg_Revenues(title_key);
+        CREATE INDEX IF NOT EXISTS idx_stg_movies_title_key ON stg_Movies(title_key);
+        {stg_projected_columns}
+        CREATE TABLE IF NOT EXISTS omdb_raw_responses (
+            imdb_id VARCHAR PRIMARY KEY,
+            title_key VARCHAR,
+            payload JSON NOT NULL,
+            fetched_at TIMESTAMP NOT NULL,
+            load_id INT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_omdb_raw_responses_title_key ON omdb_raw_responses(title_key);
+        CREATE TABLE IF NOT EXISTS stg_movies_projection (
+            signature VARCHAR NOT NULL,
+            load_id INT NOT NULL,
+            refreshed_at TIMESTAMP NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS revenue_file_manifest (
+            file_path VARCHAR NOT NULL,
+            file_size BIGINT NOT NULL,
+            mtime TIMESTAMP NOT NULL,
+            content_hash VARCHAR NOT NULL,
+            max_date DATE,
+            rows_loaded BIGINT NOT NULL,
+            batch_id INT NOT NULL,
+            loaded_at TIMESTAMP NOT NULL
+        );
+        """.format(
+            revenues_key=title_key_sql("title"),
+            movies_key=title_key_sql("Title"),
+            stg_typed_columns=typed_columns_ddl("stg_Movies"),
+            # fields or rating slots added to the projection since the table was created
+            stg_projected_columns="\n        ".join(
+                f"ALTER TABLE stg_Movies ADD COLUMN IF NOT EXISTS {column} VARCHAR;"
+                for column in OMDB_FIELDS + [
+                    f"Ratings_{idx}_{part}"
+                    for idx in range(OMDB_RATING_SLOTS) for part in ("Source", "Value")
+                ]
+            ),
+        )
         self.execute_sql(sql, "Successfully created staging tables")
 
     def create_dim_tables(self):
@@ -73,7 +215,12 @@ class ExtendedDatabaseManager(DatabaseManager):
             full_date DATE NOT NULL,
             year INT NOT NULL,
             month INT NOT NULL,
-            day INT NOT NULL
+            day INT NOT NULL,
+            quarter INT,
+            iso_year INT,
+            iso_week INT,
+            weekday INT,
+            is_weekend BOOLEAN
         );
 
         CREATE TABLE IF NOT EXISTS dim_movies (
@@ -141,9 +288,70 @@ class ExtendedDatabaseManager(DatabaseManager):
             FOREIGN KEY (movie_id) REFERENCES dim_movies(movie_id),
             FOREIGN KEY (actor_id) REFERENCES Dim_Actor(actor_id)
         );
-        """
+
+        {bridge_deltas}
+        CREATE TABLE IF NOT EXISTS dim_movies_delta (movie_id INT);
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_distribution_name ON dim_distribution(name);
+        ALTER TABLE dim_date ADD COLUMN IF NOT EXISTS quarter INT;
+        ALTER TABLE dim_date ADD COLUMN IF NOT EXISTS iso_year INT;
+        ALTER TABLE dim_date ADD COLUMN IF NOT EXISTS iso_week INT;
+        ALTER TABLE dim_date ADD COLUMN IF NOT EXISTS weekday INT;
+        ALTER TABLE dim_date ADD COLUMN IF NOT EXISTS is_weekend BOOLEAN;
+        UPDATE dim_date SET
+            quarter = quarter(full_date),
+            iso_year = isoyear(full_date),
+            iso_week = week(full_date),
+            weekday = isodow(full_date),
+            is_weekend = isodow(full_date) >= 6
+        WHERE quarter IS NULL;
+        ALTER TABLE dim_movies ADD COLUMN IF NOT EXISTS title_key VARCHAR;
+        UPDATE dim_movies SET title_key = {movies_key} WHERE title_key IS NULL;
+        CREATE INDEX IF NOT EXISTS idx_dim_movies_title_key ON dim_movies(title_key);
+        ALTER TABLE dim_movies ADD COLUMN IF NOT EXISTS imdb_id VARCHAR;
+        ALTER TABLE dim_movies ADD COLUMN IF NOT EXISTS content_hash VARCHAR;
+        ALTER TABLE dim_movies ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+        {dim_typed_columns}
+        UPDATE dim_movies SET
+            runtime_minutes = {runtime_minutes},
+            released_date = {released_date}
+        WHERE runtime_minutes IS NULL AND released_date IS NULL;
+        """.format(
+            movies_key=title_key_sql("title"),
+            dim_typed_columns=typed_columns_ddl("dim_movies"),
+            # bridge links changed by the latest load, read by the rollup refresh
+            bridge_deltas="\n        ".join(
+                f"CREATE TABLE IF NOT EXISTS {config['bridge']}_delta (movie_id INT, {config['id']} INT);"
+                for config in ROLE_DIMENSIONS.values()
+            ),
+            # only runtime and release date are kept as strings in existing rows
+            runtime_minutes=OMDB_TYPED_COLUMNS["runtime_minutes"][1].replace("Runtime", "runtime"),
+            released_date=OMDB_TYPED_COLUMNS["released_date"][1].replace("Released", "released"),
+        )
         self.execute_sql(sql, "Successfully created dimension tables")
 
+        self._ensure_sequence("dim_distribution", "distribution_id")
+        self._ensure_sequence("dim_movies", "movie_id")
+        for config in ROLE_DIMENSIONS.values():
+            self._ensure_sequence(config["table"], config["id"])
+
+    def _ensure_sequence(self, table: str, id_col: str):
+        """
+        Creates the surrogate key sequence seq_<id_col> for a dimension if it
+        does not exist yet, starting after the largest key already in the table.
+
+        Args:
+            table (str): The dimension table.
+            id_col (str): Its surrogate key column.
+        """
+        exists = self.conn.execute(
+            "SELECT COUNT(*) FROM duckdb_sequences() WHERE sequence_name = ?",
+            [f"seq_{id_col}"],
+        ).fetchone()[0]
+        if exists:
+            return
+        start = self.conn.execute(f"SELECT COALESCE(MAX({id_col}), 0) + 1 FROM {table}").fetchone()[0]
+        self.execute_sql(f"CREATE SEQUENCE IF NOT EXISTS seq_{id_col} START {start}")
+
     def create_fact_tables(self):
         """
         Creates fact tables that store measurable, quantitative data such as
@@ -161,49 +369,835 @@ class ExtendedDatabaseManager(DatabaseManager):
             FOREIGN KEY (date_id) REFERENCES dim_date(date_id),
             FOREIGN KEY (distribution_id) REFERENCES dim_distribution(distribution_id)
         );
+
+        CREATE TABLE IF NOT EXISTS fact_revenue_delta (
+            revenue_id UUID,
+            movie_id INT,
+            date_id INT,
+            distribution_id INT,
+            revenue BIGINT,
+            theaters INT
+        );
+
+        CREATE TABLE IF NOT EXISTS agg_revenue_movie_year (
+            movie_id INT NOT NULL,
+            year INT NOT NULL,
+            total_revenue BIGINT NOT NULL,
+            PRIMARY KEY (movie_id, year)
+        );
+
+        CREATE TABLE IF NOT EXISTS agg_revenue_genre_year (
+            genre_id INT NOT NULL,
+            year INT NOT NULL,
+            total_revenue BIGINT NOT NULL,
+            PRIMARY KEY (genre_id, year)
+        );
         """
         self.execute_sql(sql, "Successfully created fact tables")
 
+    def create_metadata_tables(self):
+        """
+        Creates the etl_load_version table, one row per successful ETL run.
+        Readers such as the dashboard use the latest version as a cache key.
+
+        Also creates the OMDb extraction queue (one row per title, with its
+        state, attempts and next retry time) and the per-day API request log
+        used to enforce the request budget.
+        """
+        sql = """
+        CREATE TABLE IF NOT EXISTS etl_load_version (
+            load_version INT PRIMARY KEY,
+            loaded_at TIMESTAMP NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS omdb_extraction_queue (
+            title_key VARCHAR PRIMARY KEY,
+            title VARCHAR NOT NULL,
+            priority BIGINT NOT NULL,
+            state VARCHAR NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            last_status INT,
+            last_error VARCHAR,
+            next_retry_at TIMESTAMP,
+            enqueued_at TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        );
+
+        ALTER TABLE omdb_extraction_queue ADD COLUMN IF NOT EXISTS imdb_id VARCHAR;
+
+        CREATE TABLE IF NOT EXISTS omdb_request_log (
+            day DATE PRIMARY KEY,
+            requests INT NOT NULL
+        );
+        """
+        self.execute_sql(sql, "Successfully created metadata tables")
+
+    def bump_load_version(self) -> int:
+        """
+        Records a successful ETL run and returns its new load version.
+        """
+        return self.conn.execute("""
+            INSERT INTO etl_load_version
+            SELECT COALESCE(MAX(load_version), 0) + 1, current_localtimestamp()
+            FROM etl_load_version
+            RETURNING load_version
+        """).fetchone()[0]
+
+    def get_load_version(self) -> int:
+        """
+        Returns the version of the last successful ETL run, 0 if none ran yet.
+        """
+        exists = self.conn.execute(
+            "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = 'etl_load_version'"
+        ).fetchone()[0]
+        if not exists:
+            return 0
+        return self.conn.execute(
+            "SELECT COALESCE(MAX(load_version), 0) FROM etl_load_version"
+        ).fetchone()[0]
+
+    def validate_warehouse(self) -> list:
+        """
+        Runs consistency checks on a loaded warehouse.
+
+        Returns:
+            list: Descriptions of failed checks, empty if the warehouse is valid.
+        """
+        checks = {
+            "dim_date is empty": "SELECT COUNT(*) = 0 FROM dim_date",
+            "stg_Revenues has dates missing from dim_date": """
+                SELECT COUNT(*) > 0 FROM stg_Revenues sr
+                WHERE sr.date IS NOT NULL
+                AND NOT EXISTS (SELECT 1 FROM dim_date dd WHERE dd.full_date = sr.date)
+            """,
+            "dim_movies has several movie_ids for one title": """
+                SELECT COUNT(*) > 0 FROM (
+                    SELECT title_key FROM dim_movies GROUP BY title_key HAVING COUNT(*) > 1
+                )
+            """,
+            "dim_movies has several movie_ids for one imdbID": """
+                SELECT COUNT(*) > 0 FROM (
+                    SELECT imdb_id FROM dim_movies WHERE imdb_id IS NOT NULL
+                    GROUP BY imdb_id HAVING COUNT(*) > 1
+                )
+            """,
+            "stg_Revenues has rows of known movies missing from fact_revenue": """
+                SELECT COUNT(*) > 0 FROM stg_Revenues sr
+                JOIN dim_movies m ON m.title_key = sr.title_key
+                JOIN dim_date dd ON dd.full_date = sr.date
+                JOIN dim_distribution dist ON dist.name = sr.distributor
+                WHERE NOT EXISTS (SELECT 1 FROM fact_revenue fr WHERE fr.revenue_id = sr.id)
+            """,
+            "fact_revenue references unknown movies": """
+                SELECT COUNT(*) > 0 FROM fact_revenue fr
+                WHERE NOT EXISTS (SELECT 1 FROM dim_movies m WHERE m.movie_id = fr.movie_id)
+            """,
+            "agg_revenue_movie_year does not match fact_revenue": """
+                SELECT COALESCE((SELECT SUM(total_revenue) FROM agg_revenue_movie_year), 0)
+                    <> COALESCE((SELECT SUM(revenue) FROM fact_revenue), 0)
+            """,
+            "agg_revenue_genre_year does not match agg_revenue_movie_year": """
+                SELECT COUNT(*) > 0 FROM (
+                    SELECT b.genre_id, a.year, SUM(a.total_revenue) AS total_revenue
+                    FROM agg_revenue_movie_year a
+                    JOIN Bridge_Movie_Genre b ON a.movie_id = b.movie_id
+                    GROUP BY b.genre_id, a.year
+                ) AS expected
+                FULL JOIN agg_revenue_genre_year g USING (genre_id, year)
+                WHERE expected.total_revenue IS DISTINCT FROM g.total_revenue
+            """,
+        }
+        return [name for name, sql in checks.items() if self._fetch("validate_warehouse", sql)[0][0]]
+
+# # # # # # # # # # #
+# Extraction queue  #
+# # # # # # # # # # #
+
+    def enqueue_new_titles(self):
+        """
+        Adds titles from stg_Revenues that are not in dim_movies to the
+        extraction queue, prioritized by their total revenue. Priorities of
+        queued, unfinished titles are refreshed. Titles marked done whose
+        response never reached omdb_raw_responses or dim_movies (e.g. after a
+        crash) are queued again; their responses are normally still in the
+        cache. Done titles are matched by the imdbID OMDb returned for them,
+        as the title in the response may normalize to another title_key
+        ("Spiderman" -> "Spider-Man"); rows recorded before imdb_id was kept
+        fall back to the title_key.
+        """
+        sql = """
+        INSERT INTO omdb_extraction_queue (title_key, title, priority, enqueued_at, updated_at)
+        SELECT
+            title_key,
+            MIN(title) AS title,
+            COALESCE(SUM(revenue), 0) AS priority,
+            current_localtimestamp(),
+            current_localtimestamp()
+        FROM stg_Revenues sr
+        WHERE sr.title_key IS NOT NULL AND sr.title_key <> ''
+        AND NOT EXISTS (
+            SELECT 1 FROM dim_movies m WHERE m.title_key = sr.title_key
+        )
+        GROUP BY title_key
+        ON CONFLICT (title_key) DO UPDATE SET
+            priority = excluded.priority
+        WHERE omdb_extraction_queue.state IN ('pending', 'failed');
+
+        UPDATE omdb_extraction_queue q
+        SET state = 'pending', updated_at = current_localtimestamp()
+        WHERE q.state = 'done'
+        AND (
+            (q.imdb_id IS NOT NULL
+                AND NOT EXISTS (SELECT 1 FROM omdb_raw_responses r WHERE r.imdb_id = q.imdb_id)
+                AND NOT EXISTS (SELECT 1 FROM dim_movies m WHERE m.imdb_id = q.imdb_id))
+            OR (q.imdb_id IS NULL
+                AND NOT EXISTS (SELECT 1 FROM dim_movies m WHERE m.title_key = q.title_key)
+                AND NOT EXISTS (SELECT 1 FROM stg_Movies s WHERE s.title_key = q.title_key)
+                AND NOT EXISTS (SELECT 1 FROM omdb_raw_responses r WHERE r.title_key = q.title_key))
+        );
+        """
+        self.execute_sql(sql)
+
+    def claim_extraction_batch(self, batch_size: int = None) -> list:
+        """
+        Returns the next titles to extract: pending titles and failed ones
+        whose retry time has come, highest revenue first.
+
+        Args:
+            batch_size (int, optional): Maximum number of titles, None returns all.
+
+        Returns:
+            list: Titles in priority order.
+        """
+        limit = f"LIMIT {int(batch_size)}" if batch_size else ""
+        return [row[0] for row in self._fetch("claim_extraction_batch", f"""
+            SELECT title
+            FROM omdb_extraction_queue
+            WHERE state = 'pending'
+            OR (state = 'failed' AND attempts < {EXTRACTION_MAX_ATTEMPTS}
+                AND next_retry_at <= current_localtimestamp())
+            ORDER BY priority DESC, title
+            {limit}
+        """)]
+
+    def record_extraction_results(self, results: list):
+        """
+        Stores the outcome of fetched titles in the extraction queue.
+        Successful lookups become done and keep the returned imdbID,
+        "Response": "False" ones become not_found.
+        Failed requests (429, 5xx, network errors) become failed and are
+        retried after an exponential backoff, at most EXTRACTION_MAX_ATTEMPTS
+        times. Answers served from the response cache do not count as attempts.
+
+        Args:
+            results (list): FetchResult objects returned by the extractor.
+        """
+        if not results:
+            return
+        states = [
+            "done" if result.ok else "not_found" if result.not_found else "failed"
+            for result in results
+        ]
+        self._run("record_extraction_results", f"""
+            UPDATE omdb_extraction_queue q
+            SET
+                state = r.state,
+                imdb_id = COALESCE(r.imdb_id, q.imdb_id),
+                attempts = q.attempts + CASE WHEN r.cached THEN 0 ELSE 1 END,
+                last_status = r.status_code,
+                last_error = r.error,
+                next_retry_at = CASE WHEN r.state = 'failed' THEN
+                    current_localtimestamp() + to_seconds(LEAST(
+                        {EXTRACTION_BACKOFF_SECONDS} * pow(2, q.attempts),
+                        {EXTRACTION_MAX_BACKOFF_SECONDS}
+                    ))
+                END,
+                updated_at = current_localtimestamp()
+            FROM (
+                SELECT
+                    UNNEST(?) AS title,
+                    UNNEST(?) AS state,
+                    UNNEST(?::INT[]) AS status_code,
+                    UNNEST(?::VARCHAR[]) AS error,
+                    UNNEST(?) AS cached,
+                    UNNEST(?::VARCHAR[]) AS imdb_id
+            ) AS r
+            WHERE q.title = r.title
+        """, params=[
+            [result.title for result in results],
+            states,
+            [result.status_code for result in results],
+            [result.error for result in results],
+            [result.cached for result in results],
+            [result.raw.get("imdbID") if result.ok else None for result in results],
+        ])
+
+    def record_extraction_batch(self, results: list, file_path: str = None):
+        """
+        Lands the spooled responses of one extraction batch and records the
+        outcome of its titles in a single transaction, so a title is never
+        marked done without its response in omdb_raw_responses.
+
+        Args:
+            results (list): FetchResult objects of the batch.
+            file_path (str, optional): NDJSON file with the batch's successful
+                responses, None if there are none.
+        """
+        self._run("record_extraction_batch", "BEGIN TRANSACTION")
+        try:
+            if file_path:
+                self.land_omdb_responses(file_path)
+            self.record_extraction_results(results)
+            self._run("record_extraction_batch", "COMMIT")
+        except Exception:
+            try:
+                self.conn.execute("ROLLBACK")
+            except Exception:
+                # the failure happened at or after COMMIT, nothing is left to roll back
+                pass
+            raise
+
+    def api_requests_today(self) -> int:
+        """
+        Returns the number of OMDb requests sent today.
+        """
+        return self._fetch("api_requests_today", """
+            SELECT COALESCE(MAX(requests), 0) FROM omdb_request_log
+            WHERE day = CAST(current_localtimestamp() AS DATE)
+        """)[0][0]
+
+    def record_api_requests(self, count: int):
+        """
+        Adds `count` sent OMDb requests to today's total.
+        """
+        if not count:
+            return
+        self._run("record_api_requests", """
+            INSERT INTO omdb_request_log
+            VALUES (CAST(current_localtimestamp() AS DATE), ?)
+            ON CONFLICT (day) DO UPDATE SET requests = omdb_request_log.requests + excluded.requests
+        """, params=[count])
+
+    def extraction_queue_summary(self) -> dict:
+        """
+        Returns the number of queued titles per state.
+        """
+        return dict(self._fetch(
+            "extraction_queue_summary",
+            "SELECT state, COUNT(*) FROM omdb_extraction_queue GROUP BY state ORDER BY state",
+        ))
+
+    def save_extraction_state(self, out_dir: str, since_load_id: int):
+        """
+        Writes the OMDb extraction state to Parquet files in out_dir: the
+        request log, the extraction queue and the responses landed after
+        `since_load_id`. Used before a failed snapshot is discarded, so the
+        requests already spent are neither forgotten nor repeated.
+
+        Args:
+            out_dir (str): Directory of the Parquet files, replaced if it exists.
+            since_load_id (int): Last omdb_raw_responses load_id before the run.
+        """
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir)
+        self.execute_sql(f"""
+        COPY omdb_request_log TO '{os.path.join(out_dir, "omdb_request_log.parquet")}' (FORMAT PARQUET);
+        COPY omdb_extraction_queue TO '{os.path.join(out_dir, "omdb_extraction_queue.parquet")}' (FORMAT PARQUET);
+        COPY (
+            SELECT * FROM omdb_raw_responses WHERE load_id > {int(since_load_id)}
+        ) TO '{os.path.join(out_dir, "omdb_raw_responses.parquet")}' (FORMAT PARQUET);
+        """, f"Saved OMDb extraction state to {out_dir}")
+
+    def restore_extraction_state(self, state_dir: str) -> int:
+        """
+        Merges extraction state saved by save_extraction_state into this
+        database: request counts are raised to the saved ones, queue rows are
+        replaced by newer saved ones and the saved responses are landed under
+        a new load_id. Does nothing if state_dir does not exist.
+
+        Args:
+            state_dir (str): Directory written by save_extraction_state.
+
+        Returns:
+            int: The last omdb_raw_responses load_id before the restore.
+        """
+        method = "restore_extraction_state"
+        since_load_id = self._fetch(
+            method, "SELECT COALESCE(MAX(load_id), 0) FROM omdb_raw_responses"
+        )[0][0]
+        if not os.path.isdir(state_dir):
+            return since_load_id
+
+        def saved(table):
+            return f"read_parquet('{os.path.join(state_dir, table + '.parquet')}')"
+
+        queue_columns = [
+            "title", "priority", "state", "attempts", "last_status", "last_error",
+            "next_retry_at", "enqueued_at", "updated_at", "imdb_id",
+        ]
+        queue_updates = ",\n                ".join(f"{column} = excluded.{column}" for column in queue_columns)
+        sql = f"""
+        BEGIN TRANSACTION;
+        INSERT INTO omdb_request_log
+        SELECT day, requests FROM {saved("omdb_request_log")}
+        ON CONFLICT (day) DO UPDATE SET requests = GREATEST(requests, excluded.requests);
+
+        INSERT INTO omdb_extraction_queue (title_key, {", ".join(queue_columns)})
+        SELECT title_key, {", ".join(queue_columns)} FROM {saved("omdb_extraction_queue")}
+        ON CONFLICT (title_key) DO UPDATE SET
+                {queue_updates}
+        WHERE excluded.updated_at > omdb_extraction_queue.updated_at;
+
+        INSERT INTO omdb_raw_responses (imdb_id, title_key, payload, fetched_at, load_id)
+        SELECT imdb_id, title_key, payload::JSON, fetched_at, {since_load_id + 1}
+        FROM {saved("omdb_raw_responses")}
+        ON CONFLICT (imdb_id) DO UPDATE SET
+            title_key = excluded.title_key,
+            payload = excluded.payload,
+            fetched_at = excluded.fetched_at,
+            load_id = excluded.load_id;
+        COMMIT;
+        """
+        self.execute_sql(sql, f"Restored OMDb extraction state from {state_dir}")
+        return since_load_id
+
 # # # # # # # # # # #
 # Load to warehouse #
 # # # # # # # # # # # 
 
+    def load_revenues(self, file_path: str):
+        """
+        Replaces the content of stg_Revenues with a revenue CSV file,
+        computing title_key while loading.
+
+        Args:
+            file_path (str): The path to the CSV file.
+        """
+        sql = f"""
+        DELETE FROM stg_Revenues;
+        INSERT INTO stg_Revenues BY NAME
+        SELECT *, {title_key_sql("title")} AS title_key
+        FROM read_csv_auto('{file_path}');
+        """
+        self.execute_sql(sql, "Data successfully loaded into stg_Revenues")
+
+    @staticmethod
+    def _file_hash(file_path: str) -> str:
+        """
+        Computes the SHA-256 of a file, reading it in chunks.
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _glob_root(file_pattern: str) -> str:
+        """
+        Returns the deepest directory of a glob pattern without wildcards.
+        """
+        root = os.path.dirname(os.path.abspath(file_pattern))
+        while any(char in root for char in "*?["):
+            root = os.path.dirname(root)
+        return root
+
+    def load_revenues_incremental(self, file_pattern: str = "revenues_per_day*.csv"):
+        """
+        Appends new daily revenue files to stg_Revenues without reloading history.
+
+        Every processed file is recorded in revenue_file_manifest (path relative
+        to the glob root, size, mtime, content hash and the latest date loaded
+        from it). Files whose content hash is already in the manifest are
+        skipped, even when renamed or moved; files whose content changed only
+        contribute rows dated after their previous watermark.
+        All rows appended in one call share a batch_id.
+
+        Args:
+            file_pattern (str): Glob matching the daily revenue CSV files.
+
+        Returns:
+            int | None: The batch_id of the appended rows, None if nothing new was found.
+        """
+        method = "load_revenues_incremental"
+        manifest = {
+            row[0]: row[1:]
+            for row in self._fetch(method, """
+                SELECT file_path, file_size, mtime, content_hash, max_date
+                FROM revenue_file_manifest
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY file_path ORDER BY loaded_at DESC) = 1
+            """)
+        }
+        known_hashes = dict(self._fetch(
+            method, "SELECT content_hash, MAX(max_date) FROM revenue_file_manifest GROUP BY content_hash"
+        ))
+        batch_id = self._fetch(
+            method, "SELECT COALESCE(MAX(batch_id), 0) + 1 FROM revenue_file_manifest"
+        )[0][0]
+
+        loaded_files = 0
+        loaded_rows = 0
+        root = self._glob_root(file_pattern)
+        for file_path in sorted(glob.glob(file_pattern)):
+            file_key = os.path.relpath(os.path.abspath(file_path), root).replace(os.sep, "/")
+            stat = os.stat(file_path)
+            mtime = datetime.fromtimestamp(stat.st_mtime)
+            previous = manifest.get(file_key)
+            if previous and previous[0] == stat.st_size and previous[1] == mtime:
+                continue
+            content_hash = self._file_hash(file_path)
+            if previous and previous[2] == content_hash:
+                continue
+            if content_hash in known_hashes:
+                # a renamed or moved copy of a loaded file: record it under its new key only
+                self._run(method, """
+                    INSERT INTO revenue_file_manifest
+                    VALUES (?, ?, ?, ?, ?, 0, ?, current_localtimestamp())
+                """, params=[file_key, stat.st_size, mtime, content_hash,
+                               known_hashes[content_hash], batch_id])
+                continue
+            watermark = previous[3] if previous else None
+
+            self._run(
+                method,
+                "CREATE OR REPLACE TEMP TABLE revenue_file AS SELECT * FROM read_csv_auto(?)",
+                bytes_read=stat.st_size, params=[file_path],
+            )
+            rows = self._fetch(method, f"""
+                INSERT INTO stg_Revenues BY NAME
+                SELECT *, ? AS batch_id, {title_key_sql("title")} AS title_key
+                FROM revenue_file
+                WHERE ?::DATE IS NULL OR date > ?::DATE
+            """, [batch_id, watermark, watermark])[0][0]
+            max_date = self._fetch(method, "SELECT MAX(date) FROM revenue_file")[0][0]
+            if watermark is not None and (max_date is None or watermark > max_date):
+                max_date = watermark
+            self._run(method, """
+                INSERT INTO revenue_file_manifest
+                VALUES (?, ?, ?, ?, ?, ?, ?, current_localtimestamp())
+            """, params=[file_key, stat.st_size, mtime, content_hash, max_date, rows, batch_id])
+            known_hashes[content_hash] = max_date
+            loaded_files += 1
+            loaded_rows += rows
+
+        self._run(method, "DROP TABLE IF EXISTS revenue_file")
+        if not loaded_files:
+            print("No new revenue files to load")
+            return None
+        print(f"Appended {loaded_rows} rows from {loaded_files} files into stg_Revenues (batch {batch_id})")
+        return batch_id
+
+    def load_movies_from_ndjson(self, file_path: str):
+        """
+        Lands raw OMDb responses spooled as newline-delimited JSON in the
+        omdb_raw_responses archive and refreshes stg_Movies from it.
+
+        Args:
+            file_path (str): Path to the NDJSON file, one response per line.
+        """
+        self.land_omdb_responses(file_path)
+        self.refresh_stg_movies()
+
+    def land_omdb_responses(self, file_path: str) -> int:
+        """
+        Stores raw OMDb responses unchanged as JSON in omdb_raw_responses, one
+        row per imdbID, tagged with the fetch timestamp and a new load_id. A
+        response for an already archived imdbID replaces the stored one.
+
+        Args:
+            file_path (str): Path to the NDJSON file, one response per line.
+
+        Returns:
+            int: The load_id of the landed responses.
+        """
+        load_id = self._fetch(
+            "land_omdb_responses", "SELECT COALESCE(MAX(load_id), 0) + 1 FROM omdb_raw_responses"
+        )[0][0]
+        sql = f"""
+        INSERT INTO omdb_raw_responses (imdb_id, title_key, payload, fetched_at, load_id)
+        SELECT
+            json->>'imdbID',
+            {title_key_sql("json->>'Title'")},
+            json,
+            current_localtimestamp(),
+            {load_id}
+        FROM read_ndjson_objects('{file_path}')
+        WHERE json->>'imdbID' IS NOT NULL
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY json->>'imdbID') = 1
+        ON CONFLICT (imdb_id) DO UPDATE SET
+            title_key = excluded.title_key,
+            payload = excluded.payload,
+            fetched_at = excluded.fetched_at,
+            load_id = excluded.load_id;
+        """
+        self.execute_sql(sql, f"Landed OMDb responses in omdb_raw_responses (load {load_id})")
+        return load_id
+
+    def _stg_movies_projection_sql(self) -> str:
+        """
+        Returns the SELECT projecting archived responses into the stg_Movies
+        columns: every payload is parsed once into a STRUCT, the Ratings list
+        is spread into Ratings_N_Source/Ratings_N_Value and the numeric and
+        date strings are parsed into the OMDB_TYPED_COLUMNS.
+        """
+        structure = {field: "VARCHAR" for field in OMDB_FIELDS}
+        structure["Ratings"] = [{"Source": "VARCHAR", "Value": "VARCHAR"}]
+        ratings_sql = ",\n            ".join(
+            f"Ratings[{idx + 1}].Source AS Ratings_{idx}_Source, "
+            f"Ratings[{idx + 1}].Value AS Ratings_{idx}_Value"
+            for idx in range(OMDB_RATING_SLOTS)
+        )
+        typed_sql = ",\n            ".join(
+            f"{expression} AS {column}" for column, (_, expression) in OMDB_TYPED_COLUMNS.items()
+        )
+        return f"""
+        SELECT *, {typed_sql}
+        FROM (
+            SELECT
+                {", ".join(OMDB_FIELDS)},
+                {ratings_sql},
+                {title_key_sql("Title")} AS title_key
+            FROM (
+                SELECT unnest(json_transform(payload, '{json.dumps(structure)}'))
+                FROM omdb_raw_responses
+                WHERE load_id > $since
+            ) AS response
+        ) AS raw
+        """
+
+    def refresh_stg_movies(self, full: bool = False):
+        """
+        Lazily rebuilds stg_Movies as a projection of omdb_raw_responses.
+
+        Only responses landed since the last refresh are projected, replacing
+        the previous content of stg_Movies. When the projection itself changed
+        (new OMDB_FIELDS, more OMDB_RATING_SLOTS, new typed columns) or `full`
+        is set, the whole archive is projected again, which is a local scan
+        instead of re-fetching every title. Nothing is done if neither the
+        archive nor the projection changed.
+
+        Args:
+            full (bool): Re-project the whole archive.
+        """
+        projection = self._stg_movies_projection_sql()
+        signature = hashlib.sha256(projection.encode("utf-8")).hexdigest()
+        state = next(iter(self._fetch(
+            "refresh_stg_movies", "SELECT signature, load_id FROM stg_movies_projection"
+        )), None)
+        latest = self._fetch(
+            "refresh_stg_movies", "SELECT COALESCE(MAX(load_id), 0) FROM omdb_raw_responses"
+        )[0][0]
+
+        if full or state is None or state[0] != signature:
+            since = 0
+        elif latest > state[1]:
+            since = state[1]
+        else:
+            print("stg_Movies is up to date with omdb_raw_responses")
+            return
+
+        sql = f"""
+        DELETE FROM stg_Movies;
+        INSERT INTO stg_Movies BY NAME
+        {projection.replace("$since", str(since))};
+        DELETE FROM stg_movies_projection;
+        INSERT INTO stg_movies_projection VALUES ('{signature}', {latest}, current_localtimestamp());
+        """
+        scope = "all" if since == 0 else f"loads after {since}"
+        self.execute_sql(sql, f"Projected omdb_raw_responses ({scope}) into stg_Movies")
+
+    def find_new_titles(self, batch_size: int = None) -> list:
+        """
+        Returns distinct titles from stg_Revenues that have no matching row in
+        stg_Movies or dim_movies yet, so only new titles are sent to the API.
+
+        Args:
+            batch_size (int, optional): Maximum number of titles returned,
+                None returns all of them.
+
+        Returns:
+            list: Titles ordered alphabetically.
+        """
+        limit = f"LIMIT {int(batch_size)}" if batch_size else ""
+        sql = f"""
+        SELECT DISTINCT sr.title
+        FROM stg_Revenues sr
+        WHERE sr.title IS NOT NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM dim_movies m WHERE m.title_key = sr.title_key
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM stg_Movies s WHERE s.title_key = sr.title_key
+        )
+        ORDER BY sr.title
+        {limit}
+        """
+        return self.query_sql(sql)["title"].tolist()
+
+    def extend_dim_date(self, start: str = DIM_DATE_START, end: str = DIM_DATE_END):
+        """
+        Generates missing days of dim_date inside DuckDB, so that the calendar
+        covers at least start..end and every date present in stg_Revenues.
+        Existing days are kept, so the call is cheap when nothing is missing.
+
+        Besides the date parts, each day gets its quarter, ISO year and week,
+        ISO weekday (1 = Monday) and a weekend flag.
+
+        Args:
+            start (str): First day always present (YYYY-MM-DD).
+            end (str): Last day always present (YYYY-MM-DD).
+        """
+        low, high = self._fetch("extend_dim_date", f"""
+            SELECT LEAST(DATE '{start}', MIN(date)), GREATEST(DATE '{end}', MAX(date))
+            FROM stg_Revenues
+        """)[0]
+        covered = self._fetch("extend_dim_date", f"""
+            SELECT COUNT(*) FROM dim_date
+            WHERE full_date BETWEEN DATE '{low}' AND DATE '{high}'
+        """)[0][0]
+        if covered == (high - low).days + 1:
+            print(f"dim_date already covers {low}..{high}. Skipping.")
+            return
+
+        sql = f"""
+        INSERT INTO dim_date (
+            date_id, full_date, year, month, day,
+            quarter, iso_year, iso_week, weekday, is_weekend
+        )
+        SELECT
+            year(d) * 10000 + month(d) * 100 + day(d) AS date_id,
+            d AS full_date,
+            year(d), month(d), day(d),
+            quarter(d), isoyear(d), week(d), isodow(d), isodow(d) >= 6
+        FROM (
+            SELECT CAST(generate_series AS DATE) AS d
+            FROM generate_series(DATE '{low}', DATE '{high}', INTERVAL 1 DAY)
+        ) AS days
+        ON CONFLICT (date_id) DO NOTHING;
+        """
+        self.execute_sql(sql, f"dim_date extended to {low}..{high}")
+
     def insert_to_dim_distrubtion(self):
         sql = """
-        INSERT INTO dim_distribution
+        INSERT INTO dim_distribution (distribution_id, name)
         SELECT 
-            (SELECT COALESCE(MAX(distribution_id), 0) FROM dim_distribution) + ROW_NUMBER() OVER () AS distribution_id,
+            nextval('seq_distribution_id') AS distribution_id,
             distributor
         FROM (
-            SELECT distributor
-            FROM stg_Revenues
-            EXCEPT
-            SELECT name FROM dim_distribution
-        ) AS new_distributors;
+            SELECT DISTINCT distributor
+            FROM stg_Revenues sr
+            WHERE distributor IS NOT NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM dim_distribution d WHERE d.name = sr.distributor
+            )
+            ORDER BY distributor
+        ) AS new_distributors
+        ON CONFLICT (name) DO NOTHING;
         """
         self.execute_sql(sql,"Sucessfully loaded into distribution dimension")
     
     def insert_to_dim_movie(self):
-        sql = """
-        INSERT INTO dim_movies
-        SELECT 
-            (SELECT COALESCE(MAX(movie_id), 0) FROM dim_movies) + ROW_NUMBER() OVER (ORDER BY Title) AS movie_id,
-            replace(Title, '.', '') as Title, Year, Rated, Released, Runtime
+        """
+        Merges stg_Movies into dim_movies, keyed by imdbID.
+
+        Each staged movie gets a content_hash over its DIM_MOVIE_COLUMNS. Known
+        movies are updated in place, keeping their movie_id, and only when
+        their hash changed; unknown ones are inserted with a new movie_id.
+        Rows loaded before imdb_id existed are matched once by title_key.
+        A staged movie whose title_key already belongs to another imdbID is
+        not inserted, so every title_key joins to a single movie_id.
+        The movie_ids inserted by this load are kept in dim_movies_delta
+        until the next load.
+        """
+        columns = ", ".join(DIM_MOVIE_COLUMNS)
+        hash_fields = ", ".join(f"{column} := {column}" for column in DIM_MOVIE_COLUMNS)
+        typed_columns = ", ".join(OMDB_TYPED_COLUMNS)
+        staged = f"""
+            SELECT *, md5(to_json(struct_pack({hash_fields}))::VARCHAR) AS content_hash
+            FROM (
+                SELECT
+                    imdbID AS imdb_id,
+                    replace(Title, '.', '') AS title,
+                    Year AS year,
+                    Rated AS rated,
+                    Released AS released,
+                    Runtime AS runtime,
+                    title_key,
+                    {typed_columns}
+                FROM stg_Movies
+                WHERE imdbID IS NOT NULL AND Title IS NOT NULL
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY imdbID ORDER BY title_key) = 1
+            ) AS staged_movies
+        """
+        updates = ",\n            ".join(f"{column} = s.{column}" for column in DIM_MOVIE_COLUMNS)
+        sql = f"""
+        UPDATE dim_movies d
+        SET imdb_id = s.imdb_id
+        FROM ({staged}) AS s
+        WHERE d.imdb_id IS NULL
+        AND d.title_key = s.title_key
+        AND NOT EXISTS (SELECT 1 FROM dim_movies k WHERE k.imdb_id = s.imdb_id);
+
+        UPDATE dim_movies d
+        SET
+            {updates},
+            content_hash = s.content_hash,
+            updated_at = current_localtimestamp()
+        FROM ({staged}) AS s
+        WHERE d.imdb_id = s.imdb_id
+        AND d.content_hash IS DISTINCT FROM s.content_hash;
+
+        CREATE OR REPLACE TEMP TABLE new_movies AS
+        SELECT
+            nextval('seq_movie_id') AS movie_id,
+            imdb_id, title_key, {columns}, content_hash, current_localtimestamp() AS updated_at
         FROM (
-            SELECT DISTINCT replace(Title, '.', '') as Title, Year, Rated, Released, Runtime
-            FROM stg_Movies
-            EXCEPT
-            SELECT Title, Year, Rated, Released, Runtime
-            FROM dim_movies
-        ) AS new_movies;
+            SELECT * FROM ({staged}) AS s
+            WHERE NOT EXISTS (SELECT 1 FROM dim_movies d WHERE d.imdb_id = s.imdb_id)
+            AND NOT EXISTS (SELECT 1 FROM dim_movies d WHERE d.title_key = s.title_key)
+            ORDER BY title
+        ) AS staged_new;
+
+        INSERT INTO dim_movies (movie_id, imdb_id, title_key, {columns}, content_hash, updated_at)
+        SELECT movie_id, imdb_id, title_key, {columns}, content_hash, updated_at
+        FROM new_movies;
+
+        DELETE FROM dim_movies_delta;
+        INSERT INTO dim_movies_delta SELECT movie_id FROM new_movies;
+        DROP TABLE new_movies;
         """
         self.execute_sql(sql, "Successfully loaded into movie dimension")
 
-    def insert_to_fact_revenue(self):
-        sql = """
-        INSERT INTO fact_revenue (
-            revenue_id, movie_id, date_id, distribution_id, revenue, theaters
-        )
+    def insert_to_fact_revenue(self, batch_id: int = None, sorted_insert: bool = False):
+        """
+        Loads revenue facts from stg_Revenues. The rows new to fact_revenue
+        are kept in fact_revenue_delta until the next load, so later steps
+        (e.g. the rollup refresh) can work on the touched keys only.
+
+        Args:
+            batch_id (int, optional): Restricts the load to rows appended by
+                load_revenues_incremental in that batch, plus the rows of
+                earlier batches of movies that reached dim_movies only in this
+                run (dim_movies_delta), instead of the whole staging table.
+            sorted_insert (bool): Appends the new rows ordered by date_id and
+                movie_id, so the row groups they fill have narrow zone maps.
+        """
+        # two separate branches, so the batch_id filter is pushed into the staging scan
+        staged_revenues = f"""(
+            SELECT * FROM stg_Revenues WHERE batch_id = {int(batch_id)}
+            UNION ALL
+            SELECT * FROM stg_Revenues
+            WHERE batch_id IS DISTINCT FROM {int(batch_id)}
+            AND title_key IN (
+                SELECT m.title_key
+                FROM dim_movies_delta n
+                JOIN dim_movies m ON m.movie_id = n.movie_id
+            )
+        )""" if batch_id is not None else "stg_Revenues"
+        order_by = "ORDER BY date_id, movie_id" if sorted_insert else ""
+        sql = f"""
+        DELETE FROM fact_revenue_delta;
+        INSERT INTO fact_revenue_delta
         SELECT 
             sr.id AS revenue_id,
             dt.movie_id,
@@ -211,178 +1205,339 @@ class ExtendedDatabaseManager(DatabaseManager):
             dist.distribution_id,
             sr.revenue,
             sr.theaters
-        FROM stg_Revenues sr
-        JOIN dim_movies dt ON sr.title = dt.title
+        FROM {staged_revenues} sr
+        JOIN dim_movies dt ON sr.title_key = dt.title_key
         JOIN dim_date dd ON sr.date = dd.full_date
         JOIN dim_distribution dist ON sr.distributor = dist.name
         WHERE NOT EXISTS (
-            SELECT 1 FROM fact_revenue fr
-            WHERE fr.revenue_id = sr.id
+            SELECT 1 FROM fact_revenue fr WHERE fr.revenue_id = sr.id
         );
+
+        INSERT INTO fact_revenue (
+            revenue_id, movie_id, date_id, distribution_id, revenue, theaters
+        )
+        SELECT * FROM fact_revenue_delta
+        {order_by}
+        ON CONFLICT (revenue_id) DO NOTHING;
         """
         self.execute_sql(sql, "Successfully loaded into revenue fact table")
 
+    def cluster_fact_revenue(self):
+        """
+        Rewrites fact_revenue ordered by date_id, movie_id, so the min/max
+        zone maps of its row groups let date and movie filters skip most of
+        them. The table is recreated from its own definition and refilled in
+        one transaction; the old row groups are dropped with it and their
+        blocks are freed by the following checkpoint.
+
+        Returns:
+            int: Number of row groups after the rewrite.
+        """
+        ddl = self.conn.execute(
+            "SELECT sql FROM duckdb_tables() WHERE table_name = 'fact_revenue'"
+        ).fetchone()[0]
+        sql = f"""
+        BEGIN TRANSACTION;
+        ALTER TABLE fact_revenue RENAME TO fact_revenue_unclustered;
+        {ddl}
+        INSERT INTO fact_revenue
+        SELECT * FROM fact_revenue_unclustered
+        ORDER BY date_id, movie_id;
+        DROP TABLE fact_revenue_unclustered;
+        COMMIT;
+        """
+        try:
+            self.execute_sql(sql, "Clustered fact_revenue by date_id, movie_id")
+        except Exception:
+            try:
+                self.conn.execute("ROLLBACK")
+            except Exception:
+                # the failure happened at or after COMMIT, nothing is left to roll back
+                pass
+            raise
+        self.execute_sql("CHECKPOINT")
+        return self.conn.execute(
+            "SELECT COUNT(DISTINCT row_group_id) FROM pragma_storage_info('fact_revenue')"
+        ).fetchone()[0]
 
-    def insert_to_dim_genre(self):
-        sql = """
-        INSERT INTO Dim_Genre (genre_id, genre_name)
-        SELECT 
-            (SELECT COALESCE(MAX(genre_id), 0) FROM Dim_Genre) + ROW_NUMBER() OVER (ORDER BY genre_name) AS genre_id,
-            TRIM(REPLACE(genre_name, '.', '')) AS genre_name
-        FROM (
-            SELECT DISTINCT TRIM(REPLACE(genre_name, '.', '')) AS genre_name
-            FROM stg_Movies,
-            UNNEST(split(Genre, ',')) AS genre(genre_name)
-            EXCEPT
-            SELECT genre_name FROM Dim_Genre
-        ) AS new_genres;
+    def refresh_revenue_rollups(self, full: bool = False):
         """
-        self.execute_sql(sql, "Successfully loaded into genre dimension")
+        Refreshes the revenue rollups read by the dashboard:
+        agg_revenue_movie_year (movie x year) and agg_revenue_genre_year (genre x year).
+
+        Only the movie/year keys present in fact_revenue_delta are recomputed,
+        together with the genre/year keys of those movies and of the genre
+        links changed by this load (Bridge_Movie_Genre_delta), so the cost
+        follows the size of the latest load.
+
+        Args:
+            full (bool): Rebuild both rollups from the whole fact table instead.
+        """
+        if full:
+            sql = """
+            BEGIN TRANSACTION;
+            DELETE FROM agg_revenue_movie_year;
+            INSERT INTO agg_revenue_movie_year
+            SELECT fr.movie_id, d.year, SUM(fr.revenue)
+            FROM fact_revenue fr
+            JOIN dim_date d ON fr.date_id = d.date_id
+            GROUP BY fr.movie_id, d.year;
+
+            DELETE FROM agg_revenue_genre_year;
+            INSERT INTO agg_revenue_genre_year
+            SELECT b.genre_id, a.year, SUM(a.total_revenue)
+            FROM agg_revenue_movie_year a
+            JOIN Bridge_Movie_Genre b ON a.movie_id = b.movie_id
+            GROUP BY b.genre_id, a.year;
+            COMMIT;
+            """
+            self.execute_sql(sql, "Successfully rebuilt revenue rollups")
+            return
 
-    def insert_to_bridge_movie_genre(self):
         sql = """
-        WITH movie_genre_mapping AS (
-            SELECT
-                m.movie_id,
-                TRIM(REPLACE(genre_name, '.', '')) AS genre_name
-            FROM stg_Movies s
-            JOIN dim_movies m ON LOWER(TRIM(REPLACE(m.title, '.', ''))) = LOWER(TRIM(REPLACE(s.Title, '.', '')))
-            CROSS JOIN UNNEST(split(s.Genre, ',')) AS genre(genre_name)
-        )
-        INSERT INTO Bridge_Movie_Genre (movie_id, genre_id)
-        SELECT
-            mgm.movie_id,
-            g.genre_id
-        FROM movie_genre_mapping mgm
-        JOIN dim_genre g ON TRIM(g.genre_name) = mgm.genre_name
-        WHERE NOT EXISTS (
-            SELECT 1 FROM Bridge_Movie_Genre b
-            WHERE b.movie_id = mgm.movie_id
-            AND b.genre_id = g.genre_id
+        BEGIN TRANSACTION;
+        CREATE OR REPLACE TEMP TABLE touched_movie_years AS
+        SELECT DISTINCT f.movie_id, d.year
+        FROM fact_revenue_delta f
+        JOIN dim_date d ON f.date_id = d.date_id;
+
+        CREATE OR REPLACE TEMP TABLE touched_genre_years AS
+        SELECT DISTINCT b.genre_id, t.year
+        FROM touched_movie_years t
+        JOIN Bridge_Movie_Genre b ON t.movie_id = b.movie_id
+        UNION
+        SELECT DISTINCT x.genre_id, a.year
+        FROM Bridge_Movie_Genre_delta x
+        JOIN agg_revenue_movie_year a ON a.movie_id = x.movie_id;
+
+        DELETE FROM agg_revenue_movie_year a
+        WHERE EXISTS (
+            SELECT 1 FROM touched_movie_years t
+            WHERE t.movie_id = a.movie_id AND t.year = a.year
         );
+        INSERT INTO agg_revenue_movie_year
+        SELECT fr.movie_id, d.year, SUM(fr.revenue)
+        FROM fact_revenue fr
+        JOIN dim_date d ON fr.date_id = d.date_id
+        JOIN touched_movie_years t ON t.movie_id = fr.movie_id AND t.year = d.year
+        GROUP BY fr.movie_id, d.year;
+
+        DELETE FROM agg_revenue_genre_year a
+        WHERE EXISTS (
+            SELECT 1 FROM touched_genre_years t
+            WHERE t.genre_id = a.genre_id AND t.year = a.year
+        );
+        INSERT INTO agg_revenue_genre_year
+        SELECT b.genre_id, a.year, SUM(a.total_revenue)
+        FROM agg_revenue_movie_year a
+        JOIN Bridge_Movie_Genre b ON a.movie_id = b.movie_id
+        JOIN touched_genre_years t ON t.genre_id = b.genre_id AND t.year = a.year
+        GROUP BY b.genre_id, a.year;
+
+        DROP TABLE touched_movie_years;
+        DROP TABLE touched_genre_years;
+        COMMIT;
         """
-        self.execute_sql(sql, "Successfully loaded into bridge_movie_genre")
+        self.execute_sql(sql, "Successfully refreshed revenue rollups")
 
 
-    def insert_to_dim_director(self):
-        sql = """
-        INSERT INTO Dim_Director (director_id, director_name)
-        SELECT 
-            (SELECT COALESCE(MAX(director_id), 0) FROM Dim_Director) + ROW_NUMBER() OVER (ORDER BY director_name) AS director_id,
-            director_name
-        FROM (
-            SELECT DISTINCT TRIM(director_name) AS director_name
-            FROM stg_Movies,
-            UNNEST(split(Director, ',')) AS director(director_name)
-            EXCEPT
-            SELECT director_name FROM Dim_Director
-        ) AS new_directors;
+    def export_to_parquet(self, out_dir: str = "parquet", full: bool = False):
         """
-        self.execute_sql(sql, "Successfully loaded into director dimension")
+        Exports the warehouse to Parquet for consumers that cannot open the
+        DuckDB file. fact_revenue is written partitioned by year/month and the
+        rollups by year (hive layout, e.g. fact_revenue/year=2004/month=9/);
+        dimension and bridge tables are rewritten as single files.
 
-    def insert_to_dim_writer(self):
-        sql = """
-        INSERT INTO Dim_Writer (writer_id, writer_name)
-        SELECT 
-            (SELECT COALESCE(MAX(writer_id), 0) FROM Dim_Writer) + ROW_NUMBER() OVER (ORDER BY writer_name) AS writer_id,
-            writer_name
+        Only fact partitions touched by the latest load (fact_revenue_delta)
+        are rewritten, unless `full` is set or nothing was exported yet. The
+        rollups are small and can change for years without new facts (e.g.
+        after a genre change), so they are always rewritten in full.
+
+        Args:
+            out_dir (str): Root directory of the export.
+            full (bool): Rewrite every partition.
+        """
+        fact_dir = os.path.join(out_dir, "fact_revenue")
+        full = full or not os.path.isdir(fact_dir)
+        if full:
+            touched = self._fetch(
+                "export_to_parquet",
+                "SELECT DISTINCT year, month FROM dim_date d "
+                "JOIN fact_revenue f ON f.date_id = d.date_id",
+            )
+            shutil.rmtree(fact_dir, ignore_errors=True)
+        else:
+            touched = self._fetch(
+                "export_to_parquet",
+                "SELECT DISTINCT year, month FROM dim_date d "
+                "JOIN fact_revenue_delta f ON f.date_id = d.date_id",
+            )
+
+        for year, month in touched:
+            shutil.rmtree(os.path.join(fact_dir, f"year={year}", f"month={month}"), ignore_errors=True)
+        os.makedirs(out_dir, exist_ok=True)
+
+        copy_options = "FORMAT PARQUET, OVERWRITE_OR_IGNORE, FILENAME_PATTERN 'data_{i}'"
+        if touched:
+            months = ", ".join(f"({year}, {month})" for year, month in touched)
+            self.execute_sql(f"""
+            COPY (
+                SELECT f.*, d.year, d.month
+                FROM fact_revenue f
+                JOIN dim_date d ON f.date_id = d.date_id
+                WHERE (d.year, d.month) IN ({months})
+            ) TO '{fact_dir}' ({copy_options}, PARTITION_BY (year, month));
+            """)
+        for name in ("agg_revenue_movie_year", "agg_revenue_genre_year"):
+            rollup_dir = os.path.join(out_dir, name)
+            shutil.rmtree(rollup_dir, ignore_errors=True)
+            self.execute_sql(f"COPY {name} TO '{rollup_dir}' ({copy_options}, PARTITION_BY (year))")
+
+        tables = ["dim_date", "dim_movies", "dim_distribution"]
+        for config in ROLE_DIMENSIONS.values():
+            tables += [config["table"], config["bridge"]]
+        for table in tables:
+            path = os.path.join(out_dir, f"{table}.parquet")
+            self.execute_sql(f"COPY {table} TO '{path}' (FORMAT PARQUET)")
+        print(f"Exported {len(touched)} fact partitions and {len(tables)} tables to {out_dir}")
+
+    def explode_movie_roles(self):
+        """
+        Splits every multi-valued field listed in ROLE_DIMENSIONS (genres,
+        directors, writers, actors) into stg_Movie_Roles as
+        (movie_key, role, name) rows, using a single scan of stg_Movies.
+        """
+        fields_sql = ", ".join(
+            f"{{'role': '{role}', 'value': {config['source']}}}"
+            for role, config in ROLE_DIMENSIONS.items()
+        )
+        sql = f"""
+        DELETE FROM stg_Movie_Roles;
+        INSERT INTO stg_Movie_Roles (movie_key, role, name)
+        SELECT
+            m.movie_key,
+            m.field.role AS role,
+            TRIM(v.name) AS name
         FROM (
-            SELECT DISTINCT TRIM(writer_name) AS writer_name
-            FROM stg_Movies,
-            UNNEST(split(Writer, ',')) AS writer(writer_name)
-            EXCEPT
-            SELECT writer_name FROM Dim_Writer
-        ) AS new_writers;
+            SELECT
+                title_key AS movie_key,
+                UNNEST([{fields_sql}]) AS field
+            FROM stg_Movies
+        ) AS m,
+        UNNEST(split(m.field.value, ',')) AS v(name)
+        WHERE TRIM(v.name) <> '';
         """
-        self.execute_sql(sql, "Successfully loaded into writer dimension")
+        self.execute_sql(sql, "Successfully exploded movie roles")
 
+    def insert_to_role_dimension(self, role: str):
+        """
+        Loads new names of one role from stg_Movie_Roles into its dimension table.
 
-    def insert_to_dim_actor(self):
-        sql = """
-        INSERT INTO Dim_Actor (actor_id, actor_name)
+        Args:
+            role (str): A key of ROLE_DIMENSIONS.
+        """
+        config = ROLE_DIMENSIONS[role]
+        table, id_col, name_col = config["table"], config["id"], config["name"]
+        name_sql = "TRIM(REPLACE(name, '.', ''))" if config["strip_dots"] else "name"
+        sql = f"""
+        INSERT INTO {table} ({id_col}, {name_col})
         SELECT 
-            (SELECT COALESCE(MAX(actor_id), 0) FROM Dim_Actor) + ROW_NUMBER() OVER (ORDER BY actor_name) AS actor_id,
-            actor_name
+            nextval('seq_{id_col}') AS {id_col},
+            {name_col}
         FROM (
-            SELECT DISTINCT TRIM(actor_name) AS actor_name
-            FROM stg_Movies,
-            UNNEST(split(Actors, ',')) AS actor(actor_name)
-            EXCEPT
-            SELECT actor_name FROM Dim_Actor
-        ) AS new_actors;
+            SELECT DISTINCT {name_sql} AS {name_col}
+            FROM stg_Movie_Roles r
+            WHERE role = '{role}'
+            AND NOT EXISTS (
+                SELECT 1 FROM {table} d WHERE d.{name_col} = {name_sql}
+            )
+            ORDER BY {name_col}
+        ) AS new_names
+        ON CONFLICT ({name_col}) DO NOTHING;
+        """
+        self.execute_sql(sql, f"Successfully loaded into {role} dimension")
+
+    def insert_to_role_bridge(self, role: str):
         """
-        self.execute_sql(sql, "Successfully loaded into actor dimension")
+        Syncs one role's bridge table with stg_Movie_Roles: movies staged in
+        this load get the links found in staging, and their links that are no
+        longer there (e.g. a genre changed on OMDb) are removed. The added and
+        removed links are kept in <bridge>_delta until the next load, so the
+        rollup refresh only recomputes the affected movies.
 
+        Args:
+            role (str): A key of ROLE_DIMENSIONS.
+        """
+        config = ROLE_DIMENSIONS[role]
+        table, id_col, name_col, bridge = config["table"], config["id"], config["name"], config["bridge"]
+        sql = f"""
+        BEGIN TRANSACTION;
+        CREATE OR REPLACE TEMP TABLE staged_links AS
+        SELECT DISTINCT
+            m.movie_id,
+            d.{id_col}
+        FROM stg_Movie_Roles r
+        JOIN dim_movies m ON m.title_key = r.movie_key
+        JOIN {table} d ON TRIM(REPLACE(d.{name_col}, '.', '')) = TRIM(REPLACE(r.name, '.', ''))
+        WHERE r.role = '{role}';
 
-    def insert_to_bridge_movie_director(self):
-        sql = """
-        WITH movie_director_mapping AS (
-            SELECT
-                m.movie_id,
-                TRIM(REPLACE(director_name, '.', '')) AS director_name
-            FROM stg_Movies s
-            JOIN dim_movies m ON LOWER(TRIM(REPLACE(m.title, '.', ''))) = LOWER(TRIM(REPLACE(s.Title, '.', '')))
-            CROSS JOIN UNNEST(split(s.Director, ',')) AS director(director_name)
+        DELETE FROM {bridge}_delta;
+        INSERT INTO {bridge}_delta (movie_id, {id_col})
+        SELECT b.movie_id, b.{id_col}
+        FROM {bridge} b
+        WHERE b.movie_id IN (
+            SELECT m.movie_id
+            FROM stg_Movie_Roles r
+            JOIN dim_movies m ON m.title_key = r.movie_key
         )
-        INSERT INTO Bridge_Movie_Director (movie_id, director_id)
-        SELECT
-            mdm.movie_id,
-            d.director_id
-        FROM movie_director_mapping mdm
-        JOIN Dim_Director d ON TRIM(REPLACE(d.director_name, '.', '')) = mdm.director_name
-        WHERE NOT EXISTS (
-            SELECT 1 FROM Bridge_Movie_Director b
-            WHERE b.movie_id = mdm.movie_id
-            AND b.director_id = d.director_id
+        AND NOT EXISTS (
+            SELECT 1 FROM staged_links s
+            WHERE s.movie_id = b.movie_id AND s.{id_col} = b.{id_col}
         );
-        """
-        self.execute_sql(sql, "Successfully loaded into bridge_movie_director")
+        DELETE FROM {bridge} b
+        USING {bridge}_delta x
+        WHERE b.movie_id = x.movie_id AND b.{id_col} = x.{id_col};
 
-    def insert_to_bridge_movie_writer(self):
-        sql = """
-        WITH movie_writer_mapping AS (
-            SELECT
-                m.movie_id,
-                TRIM(REPLACE(writer_name, '.', '')) AS writer_name
-            FROM stg_Movies s
-            JOIN dim_movies m ON LOWER(TRIM(REPLACE(m.title, '.', ''))) = LOWER(TRIM(REPLACE(s.Title, '.', '')))
-            CROSS JOIN UNNEST(split(s.Writer, ',')) AS writer(writer_name)
-        )
-        INSERT INTO Bridge_Movie_Writer (movie_id, writer_id)
-        SELECT
-            mwm.movie_id,
-            w.writer_id
-        FROM movie_writer_mapping mwm
-        JOIN Dim_Writer w ON TRIM(REPLACE(w.writer_name, '.', '')) = mwm.writer_name
+        INSERT INTO {bridge}_delta (movie_id, {id_col})
+        SELECT s.movie_id, s.{id_col}
+        FROM staged_links s
         WHERE NOT EXISTS (
-            SELECT 1 FROM Bridge_Movie_Writer b
-            WHERE b.movie_id = mwm.movie_id
-            AND b.writer_id = w.writer_id
+            SELECT 1 FROM {bridge} b
+            WHERE b.movie_id = s.movie_id AND b.{id_col} = s.{id_col}
         );
-        """
-        self.execute_sql(sql, "Successfully loaded into bridge_movie_writer")
-
-    def insert_to_bridge_movie_actor(self):
-        sql = """
-        WITH movie_actor_mapping AS (
-            SELECT
-                m.movie_id,
-                TRIM(REPLACE(actor_name, '.', '')) AS actor_name
-            FROM stg_Movies s
-            JOIN dim_movies m ON LOWER(TRIM(REPLACE(m.title, '.', ''))) = LOWER(TRIM(REPLACE(s.Title, '.', '')))
-            CROSS JOIN UNNEST(split(s.Actors, ',')) AS actor(actor_name)
-        )
-        INSERT INTO Bridge_Movie_Actor (movie_id, actor_id)
-        SELECT
-            mam.movie_id,
-            a.actor_id
-        FROM movie_actor_mapping mam
-        JOIN Dim_Actor a ON TRIM(REPLACE(a.actor_name, '.', '')) = mam.actor_name
+        INSERT INTO {bridge} (movie_id, {id_col})
+        SELECT s.movie_id, s.{id_col}
+        FROM staged_links s
         WHERE NOT EXISTS (
-            SELECT 1 FROM Bridge_Movie_Actor b
-            WHERE b.movie_id = mam.movie_id
-            AND b.actor_id = a.actor_id
+            SELECT 1 FROM {bridge} b
+            WHERE b.movie_id = s.movie_id AND b.{id_col} = s.{id_col}
         );
+
+        DROP TABLE staged_links;
+        COMMIT;
         """
-        self.execute_sql(sql, "Successfully loaded into bridge_movie_actor")
+        self.execute_sql(sql, f"Successfully loaded into {bridge.lower()}")
+
+    def insert_to_dim_genre(self):
+        self.insert_to_role_dimension("genre")
+
+    def insert_to_dim_director(self):
+        self.insert_to_role_dimension("director")
+
+    def insert_to_dim_writer(self):
+        self.insert_to_role_dimension("writer")
 
+    def insert_to_dim_actor(self):
+        self.insert_to_role_dimension("actor")
+
+    def insert_to_bridge_movie_genre(self):
+        self.insert_to_role_bridge("genre")
+
+    def insert_to_bridge_movie_director(self):
+        self.insert_to_role_bridge("director")
+
+    def insert_to_bridge_movie_writer(self):
+        self.insert_to_role_bridge("writer")
+
+    def insert_to_bridge_movie_actor(self):
+        self.insert_to_role_bridge("actor")
@@ -0,0 +1,282 @@
+"""
+Module collecting per-statement metrics from DatabaseManager calls.
+
+An Instrumentation attached to a DatabaseManager (see DatabaseManager.instrument)
+runs every statement issued through execute_sql, query_sql, load_csv_to_table,
+insert_from_df, insert_from_arrow and the internal _run/_fetch helpers one by
+one and records its duration, rows affected and bytes read, taken from DuckDB's
+query profiler. With `profile` set the full
+EXPLAIN ANALYZE operator tree of every statement is kept as well.
+
+Metrics are tagged with the ETL step running on the current thread and can be
+written as a JSON run log and as a Prometheus textfile (node_exporter textfile
+collector format).
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+import duckdb
+
+
+# statements whose result is the number of affected rows
+COUNTED_STATEMENTS = {
+    duckdb.StatementType.INSERT,
+    duckdb.StatementType.UPDATE,
+    duckdb.StatementType.DELETE,
+    duckdb.StatementType.COPY,
+}
+
+PROFILING_METRICS = json.dumps({
+    "LATENCY": "true",
+    "ROWS_RETURNED": "true",
+    "TOTAL_BYTES_READ": "true",
+    "OPERATOR_TIMING": "true",
+    "OPERATOR_CARDINALITY": "true",
+})
+
+
+@dataclass
+class StatementMetric:
+    """
+    Measurements of a single executed statement.
+
+    Args:
+        step (str): ETL step the statement ran in, None outside of steps.
+        method (str): DatabaseManager method that issued it.
+        sql (str): Statement text, shortened to SQL_PREVIEW characters.
+        started_at (str): ISO timestamp of the start.
+        duration (float): Wall time in seconds.
+        rows (int): Rows affected (DML, COPY) or returned (queries), None if unknown.
+        bytes_read (int): Bytes read according to the profiler, or the input size.
+        error (str): Error message if the statement failed.
+        profile (dict): EXPLAIN ANALYZE operator tree, only with profiling enabled.
+    """
+    step: str
+    method: str
+    sql: str
+    started_at: str
+    duration: float
+    rows: int = None
+    bytes_read: int = None
+    error: str = None
+    profile: dict = None
+
+
+class Instrumentation:
+    """
+    Thread-safe collector of StatementMetric records for one ETL run.
+    """
+
+    SQL_PREVIEW = 500
+
+    def __init__(self, run_id: str = None, profile: bool = False):
+        """
+        Args:
+            run_id (str, optional): Identifier written to the run log, generated if omitted.
+            profile (bool): Keep the EXPLAIN ANALYZE operator tree of every statement.
+        """
+        self.run_id = run_id or f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.profile = profile
+        self.metrics = []
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def attach(self, conn):
+        """
+        Enables DuckDB's profiler (without printing) on a connection or cursor.
+        """
+        conn.execute("PRAGMA enable_profiling = 'no_output'")
+        conn.execute(f"SET custom_profiling_settings = '{PROFILING_METRICS}'")
+
+    @contextmanager
+    def step(self, name: str):
+        """
+        Tags all statements issued by the current thread with a step name.
+        """
+        previous = getattr(self._local, "step", None)
+        self._local.step = name
+        try:
+            yield
+        finally:
+            self._local.step = previous
+
+    def _profile(self, conn) -> dict:
+        try:
+            return json.loads(conn.get_profiling_information(format="json"))
+        except (duckdb.Error, ValueError):
+            return {}
+
+    def _record(self, conn, method: str, sql: str, started_at: datetime, start: float,
+                rows: int = None, bytes_read: int = None, error: str = None):
+        duration = time.perf_counter() - start
+        profile = self._profile(conn) if error is None else {}
+        if bytes_read is None:
+            bytes_read = profile.get("total_bytes_read")
+        metric = StatementMetric(
+            step=getattr(self._local, "step", None),
+            method=method,
+            sql=" ".join(sql.split())[:self.SQL_PREVIEW],
+            started_at=started_at.isoformat(),
+            duration=round(duration, 6),
+            rows=rows,
+            bytes_read=bytes_read,
+            error=error,
+            profile=profile if self.profile and profile else None,
+        )
+        with self._lock:
+            self.metrics.append(metric)
+
+    def execute(self, conn, method: str, sql: str, bytes_read: int = None, params: list = None):
+        """
+        Executes each statement of `sql` on `conn` and records it. A failing
+        statement is recorded with its error and the exception is re-raised.
+
+        Args:
+            conn: DuckDB connection or cursor with profiling attached.
+            method (str): Name of the calling DatabaseManager method.
+            sql (str): One or more SQL statements.
+            bytes_read (int, optional): Input size to report instead of the profiler's.
+            params (list, optional): Parameters of a single prepared statement.
+        """
+        for statement in conn.extract_statements(sql):
+            started_at, start = datetime.now(), time.perf_counter()
+            try:
+                result = conn.execute(statement, params)
+                rows = result.fetchone()[0] if statement.type in COUNTED_STATEMENTS else None
+            except Exception as e:
+                self._record(conn, method, statement.query, started_at, start, error=str(e))
+                raise
+            self._record(conn, method, statement.query, started_at, start, rows, bytes_read)
+
+    def fetch(self, conn, method: str, sql: str, params: list = None) -> list:
+        """
+        Runs a single statement on `conn`, records it and returns all result
+        rows. DML statements are recorded with their affected row count.
+        """
+        started_at, start = datetime.now(), time.perf_counter()
+        try:
+            statement = conn.extract_statements(sql)[0]
+            rows = conn.execute(statement, params).fetchall()
+        except Exception as e:
+            self._record(conn, method, sql, started_at, start, error=str(e))
+            raise
+        count = rows[0][0] if statement.type in COUNTED_STATEMENTS and rows else len(rows)
+        self._record(conn, method, sql, started_at, start, rows=count)
+        return rows
+
+    def query(self, conn, method: str, sql: str):
+        """
+        Runs a SELECT on `conn`, records it and returns the result as a DataFrame.
+        """
+        started_at, start = datetime.now(), time.perf_counter()
+        try:
+            result = conn.sql(sql).fetchdf()
+        except Exception as e:
+            self._record(conn, method, sql, started_at, start, error=str(e))
+            raise
+        self._record(conn, method, sql, started_at, start, rows=len(result))
+        return result
+
+    def summary(self) -> list:
+        """
+        Aggregates the metrics per (step, method).
+
+        Returns:
+            list: Dicts with step, method, statements, errors, duration, rows
+            and bytes_read, slowest first.
+        """
+        totals = {}
+        with self._lock:
+            metrics = list(self.metrics)
+        for metric in metrics:
+            key = (metric.step or "", metric.method)
+            total = totals.setdefault(key, {
+                "step": key[0], "method": key[1], "statements": 0,
+                "errors": 0, "duration": 0.0, "rows": 0, "bytes_read": 0,
+            })
+            total["statements"] += 1
+            total["errors"] += metric.error is not None
+            total["duration"] += metric.duration
+            total["rows"] += metric.rows or 0
+            total["bytes_read"] += metric.bytes_read or 0
+        for total in totals.values():
+            total["duration"] = round(total["duration"], 6)
+        return sorted(totals.values(), key=lambda total: total["duration"], reverse=True)
+
+    def slowest(self, limit: int = 5) -> list:
+        """
+        Returns the `limit` slowest statements.
+        """
+        with self._lock:
+            return sorted(self.metrics, key=lambda metric: metric.duration, reverse=True)[:limit]
+
+    def write_json(self, path: str):
+        """
+        Writes the run log: run metadata, per-step totals and every statement.
+        """
+        with self._lock:
+            statements = [asdict(metric) for metric in self.metrics]
+        log = {
+            "run_id": self.run_id,
+            "started_at": self.started_at.isoformat(),
+            "duration": round(time.perf_counter() - self._started, 6),
+            "summary": self.summary(),
+            "statements": statements,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(log, f, indent=2, default=str)
+
+    def write_prometheus(self, path: str):
+        """
+        Writes per-step totals in Prometheus text format. The file is replaced
+        atomically so the textfile collector never reads a partial file.
+        """
+        def escape(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"')
+
+        series = {
+            "omdb_etl_statement_duration_seconds": ("Time spent in SQL statements.", "duration"),
+            "omdb_etl_statement_rows": ("Rows affected or returned by SQL statements.", "rows"),
+            "omdb_etl_statement_bytes_read": ("Bytes read by SQL statements.", "bytes_read"),
+            "omdb_etl_statements": ("Number of SQL statements executed.", "statements"),
+            "omdb_etl_statement_errors": ("Number of failed SQL statements.", "errors"),
+        }
+        summary = self.summary()
+        lines = []
+        for name, (help_text, field) in series.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for total in summary:
+                labels = f'step="{escape(total["step"])}",method="{escape(total["method"])}"'
+                lines.append(f"{name}{{{labels}}} {total[field]}")
+        lines.append("# HELP omdb_etl_run_duration_seconds Wall time of the last ETL run.")
+        lines.append("# TYPE omdb_etl_run_duration_seconds gauge")
+        lines.append(f"omdb_etl_run_duration_seconds {time.perf_counter() - self._started:.6f}")
+        lines.append("# HELP omdb_etl_run_timestamp_seconds Start time of the last ETL run.")
+        lines.append("# TYPE omdb_etl_run_timestamp_seconds gauge")
+        lines.append(f"omdb_etl_run_timestamp_seconds {self.started_at.timestamp():.0f}")
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    def report(self, limit: int = 5):
+        """
+        Prints the slowest statements.
+        """
+        print(f"Slowest statements of run {self.run_id}:")
+        for metric in self.slowest(limit):
+            rows = "-" if metric.rows is None else f"{metric.rows:,}"
+            print(f"  {metric.duration:8.3f}s {rows:>12} rows  [{metric.step or '-'}] {metric.sql[:80]}")
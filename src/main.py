@@ -1,90 +1,296 @@
-from auth import DatabaseManager
-import pandas as pd
-from database import ExtendedDatabaseManager
-from api import BaseExtractor
+import argparse
+import os
 
-def init_dim_date():
+from auth import ConnectionManager
+from database import ExtendedDatabaseManager, ROLE_DIMENSIONS
+from api import QueuedExtractor
+from cache import ResponseCache
+from instrumentation import Instrumentation
+from scheduler import Step, StepScheduler
+from snapshot import SnapshotStore
+
+def init_dim_date(db: ExtendedDatabaseManager):
     """
-    Initializes and populates the 'dim_date' dimension table with a full date range
-    from 2000-01-01 to 2030-12-31.
+    Makes sure the 'dim_date' dimension covers 2000-01-01..2030-12-31 and
+    every date in stg_Revenues, so no revenue row is dropped by the fact join.
 
-    This function generates a DataFrame with fields:
-        - full_date: actual date
+    The calendar is generated inside DuckDB (generate_series) with:
         - date_id: integer representation in YYYYMMDD format
-        - year, month, day: extracted date parts
+        - full_date, year, month, day
+        - quarter, iso_year, iso_week, weekday (1 = Monday), is_weekend
 
-    The data is then inserted into the 'dim_date' table using the DatabaseManager.
+    Args:
+        db (ExtendedDatabaseManager): Database to load into, e.g. a ConnectionManager's writer.
     """
-    db = DatabaseManager("Movies.db")
-    
-    row_count = db.conn.sql("SELECT COUNT(*) AS count from dim_date").fetchone()[0]
-    if row_count > 0:
-        print("dim_date already populated.Skipping.")
-        return
-    # creating range of dates
-    date_range = pd.date_range(start="2000-01-01", end="2030-12-31", freq="D")
-    dim_date_df = pd.DataFrame({
-        "full_date": date_range,
-        "date_id": date_range.strftime("%Y%m%d").astype(int),
-        "year": date_range.year,
-        "month": date_range.month,
-        "day": date_range.day
-    })
-
-    # inserting into dim_date from dataframe
-    db.insert_from_df("dim_date", dim_date_df)
-
-def load_to_staging_from_api():
+    db.extend_dim_date()
+
+def load_to_staging_from_api(db: ExtendedDatabaseManager):
     """
-    Extracts movie data using the BaseExtractor, flattens the JSON structure,
-    and loads the resulting data into the 'stg_Movies' staging table in the database.
+    Extracts data for titles not yet in the warehouse by draining the extraction
+    queue with the QueuedExtractor (within the daily OMDb request budget). The
+    raw JSON responses of every batch are landed in the 'omdb_raw_responses'
+    archive as the batch completes. The 'stg_Movies' staging table is then
+    refreshed as a projection of the archive, which also re-projects all
+    archived responses when the stg_Movies projection changed.
 
     This function is responsible for populating the staging layer with raw movie data
-    fetched from an external API or local test JSON.
+    fetched from an external API or local test JSON. Responses are served from
+    the on-disk ResponseCache when possible.
+
+    Args:
+        db (ExtendedDatabaseManager): Database to load into, e.g. a ConnectionManager's writer.
     """
-    db = DatabaseManager("Movies.db")
-    extractor = BaseExtractor()
-    results = extractor.fetch_data()
-    df = pd.DataFrame(results)
-    db.insert_from_df("stg_Movies",df)
+    cache = ResponseCache()
+    extractor = QueuedExtractor(cache=cache, db=db)
+    try:
+        landed = extractor.land_responses()
+        print(f"OMDb cache: {cache.stats()}")
+        if not landed:
+            print("No new OMDb responses to land.")
+        db.refresh_stg_movies()
+    finally:
+        cache.close()
     
 
-def main():
+def save_failed_run_state(dbname: str, state_dir: str, since_load_id: int):
+    """
+    Saves the OMDb extraction state of a failed snapshot before it is
+    discarded, so the next run does not exceed the daily request budget or
+    fetch the same titles again. A snapshot too broken to open is skipped.
+
+    Args:
+        dbname (str): The failed, unpublished snapshot.
+        state_dir (str): Directory the state is written to.
+        since_load_id (int): Last omdb_raw_responses load_id before the run.
+    """
+    try:
+        with ExtendedDatabaseManager(dbname) as db:
+            db.save_extraction_state(state_dir, since_load_id)
+    except Exception as e:
+        print(f"Could not save the OMDb extraction state of the failed run: {e}")
+
+
+def build_steps(revenue_files: str, incremental: bool, parquet_dir: str = None) -> list:
+    """
+    Declares the warehouse load steps together with the tables each one
+    reads and writes, so StepScheduler can run independent steps in parallel.
+
+    Args:
+        revenue_files (str): Revenue CSV file, or glob in incremental mode.
+        incremental (bool): Append only new revenue files instead of a full reload.
+        parquet_dir (str, optional): Export the warehouse to Parquet there after loading.
+
+    Returns:
+        list: Steps in declaration order.
+    """
+    state = {"batch_id": None}
+
+    def load_revenues(db):
+        if incremental:
+            state["batch_id"] = db.load_revenues_incremental(revenue_files)
+        else:
+            db.load_revenues(revenue_files)
+
+    steps = [
+        Step("load_revenues", load_revenues,
+             outputs=("stg_Revenues",)),
+        Step("load_movies_staging", load_to_staging_from_api,
+             inputs=("stg_Revenues", "dim_movies"), outputs=("omdb_raw_responses", "stg_Movies")),
+        Step("init_dim_date", init_dim_date,
+             inputs=("stg_Revenues",), outputs=("dim_date",)),
+
+        Step("dim_distribution", lambda db: db.insert_to_dim_distrubtion(),
+             inputs=("stg_Revenues",), outputs=("dim_distribution",)),
+        Step("dim_movie", lambda db: db.insert_to_dim_movie(),
+             inputs=("stg_Movies",), outputs=("dim_movies", "dim_movies_delta")),
+        # daily batches are appended date-ordered, keeping fact_revenue's zone maps narrow
+        Step("fact_revenue", lambda db: db.insert_to_fact_revenue(state["batch_id"], sorted_insert=incremental),
+             inputs=("stg_Revenues", "dim_movies", "dim_movies_delta", "dim_date", "dim_distribution"),
+             outputs=("fact_revenue",)),
+
+        Step("explode_movie_roles", lambda db: db.explode_movie_roles(),
+             inputs=("stg_Movies",), outputs=("stg_Movie_Roles",)),
+    ]
+    # one dimension and one bridge load per exploded role
+    for role, config in ROLE_DIMENSIONS.items():
+        steps.append(Step(
+            f"dim_{role}", lambda db, role=role: db.insert_to_role_dimension(role),
+            inputs=("stg_Movie_Roles",), outputs=(config["table"],),
+        ))
+    for role, config in ROLE_DIMENSIONS.items():
+        steps.append(Step(
+            f"bridge_movie_{role}", lambda db, role=role: db.insert_to_role_bridge(role),
+            inputs=("stg_Movie_Roles", "dim_movies", config["table"]),
+            outputs=(config["bridge"], f"{config['bridge']}_delta"),
+        ))
+    steps.append(Step(
+        "revenue_rollups", lambda db: db.refresh_revenue_rollups(),
+        inputs=("fact_revenue", "dim_date", "Bridge_Movie_Genre", "Bridge_Movie_Genre_delta"),
+        outputs=("agg_revenue_movie_year", "agg_revenue_genre_year"),
+    ))
+    if parquet_dir:
+        tables = ["fact_revenue", "fact_revenue_delta", "agg_revenue_movie_year",
+                  "agg_revenue_genre_year", "dim_date", "dim_movies", "dim_distribution"]
+        for config in ROLE_DIMENSIONS.values():
+            tables += [config["table"], config["bridge"]]
+        steps.append(Step(
+            "export_parquet", lambda db: db.export_to_parquet(parquet_dir),
+            inputs=tuple(tables),
+        ))
+    return steps
+
+
+def main(revenue_files: str = "revenues_per_day.csv", incremental: bool = False,
+         max_workers: int = 4, snapshot_dir: str = None, parquet_dir: str = None,
+         metrics_dir: str = None, profile: bool = False):
 
     """
     Main ETL pipeline function that:
         - Creates all staging, dimension, and fact tables
-        - Loads revenue data from CSV into staging
+        - Loads revenue data from CSV into staging (fully, or only new files
+          matching the `revenue_files` glob when `incremental` is set)
         - Loads date dimension table
         - Extracts and loads movie data into staging
         - Populates dimension and fact tables from staging data
 
+    Table creation runs first; the load steps then run through StepScheduler,
+    which executes independent steps concurrently (up to `max_workers`), stops
+    on the first failure and prints a critical-path timing report. After a
+    successful run the warehouse load version is bumped, which invalidates
+    the dashboard caches. All steps share one writer connection from a
+    ConnectionManager, which closes it when the run ends.
+
+    With `snapshot_dir` set, the run builds into a fresh copy of the current
+    snapshot in that directory (the first one starts from Movies.db), validates
+    it and only then publishes it as the new current snapshot; a failed run is
+    discarded and never seen by readers. Its OMDb request log, extraction queue
+    and newly landed responses are kept in the store's state_dir and merged
+    into the next run's snapshot.
+
+    With `parquet_dir` set, fact_revenue, the rollups and the dimensions are
+    also exported to year/month partitioned Parquet files, rewriting only the
+    fact partitions touched by this load and the rollups in full.
+
+    With `metrics_dir` set, every SQL statement is timed and counted per step;
+    a JSON run log (run_<id>.json) and a Prometheus textfile (omdb_etl.prom)
+    are written there, also for failed runs. `profile` additionally keeps the
+    EXPLAIN ANALYZE operator tree of each statement in the run log.
+
     It serves as the entry point for building the movie data warehouse from scratch.
     """
-    db = ExtendedDatabaseManager()
-    db.create_staging_tables()
-    db.create_dim_tables()
-    db.create_fact_tables()
+    store = SnapshotStore(snapshot_dir) if snapshot_dir else None
+    dbname = store.new_snapshot(seed="Movies.db") if store else "Movies.db"
+
+    instrumentation = Instrumentation(profile=profile) if metrics_dir else None
+
+    since_load_id = None
+    try:
+        with ConnectionManager(dbname) as connections:
+            db = connections.manager(ExtendedDatabaseManager)
+            if instrumentation:
+                db.instrument(instrumentation)
+            db.create_staging_tables()
+            db.create_dim_tables()
+            db.create_fact_tables()
+            db.create_metadata_tables()
+            if store:
+                # OMDb requests and responses of an earlier, discarded run
+                since_load_id = db.restore_extraction_state(store.state_dir)
+
+            scheduler = StepScheduler(db, build_steps(revenue_files, incremental, parquet_dir), max_workers)
+            scheduler.run()
 
-    db.load_csv_to_table("stg_Revenues", "revenues_per_day.csv")
-    load_to_staging_from_api()
-    init_dim_date()
+            load_version = db.bump_load_version()
+            problems = db.validate_warehouse()
+            for problem in problems:
+                print(f"Validation failed: {problem}")
+            if problems and store:
+                raise RuntimeError("Warehouse validation failed, snapshot not published")
+            db.execute_sql("CHECKPOINT")
+    except Exception:
+        if store:
+            if since_load_id is not None:
+                save_failed_run_state(dbname, store.state_dir, since_load_id)
+            store.discard(dbname)
+        raise
+    finally:
+        if instrumentation:
+            instrumentation.write_json(os.path.join(metrics_dir, f"run_{instrumentation.run_id}.json"))
+            instrumentation.write_prometheus(os.path.join(metrics_dir, "omdb_etl.prom"))
+            instrumentation.report()
 
-    db.insert_to_dim_distrubtion()
-    db.insert_to_dim_movie()
-    db.insert_to_fact_revenue()
+    if store:
+        store.publish(dbname)
+        store.clear_state()
+    print(f"Warehouse load version {load_version} published")
 
-    db.insert_to_dim_genre()
-    db.insert_to_dim_director()
-    db.insert_to_dim_writer()
-    db.insert_to_dim_actor()
+def maintain(snapshot_dir: str = None, compact: bool = False):
+    """
+    Storage maintenance of the warehouse, run between ETL loads:
+        - Rewrites fact_revenue clustered by date_id, movie_id
+        - Forces a checkpoint, freeing the blocks of deleted rows
+          (old fact row groups, replaced staging and delta tables)
+        - With `compact`, replaces the database file with a compacted copy
+          (COPY FROM DATABASE), the only way to shrink a DuckDB file
+
+    With `snapshot_dir` set, the maintenance runs on a new snapshot that is
+    validated and published like an ETL run; otherwise Movies.db is rewritten.
+    """
+    store = SnapshotStore(snapshot_dir) if snapshot_dir else None
+    dbname = store.new_snapshot(seed="Movies.db") if store else "Movies.db"
+    size_before = os.path.getsize(dbname) if os.path.exists(dbname) else 0
 
-    #bridge tables
-    db.insert_to_bridge_movie_genre()
-    db.insert_to_bridge_movie_director()
-    db.insert_to_bridge_movie_writer()
-    db.insert_to_bridge_movie_actor()
+    try:
+        with ConnectionManager(dbname) as connections:
+            db = connections.manager(ExtendedDatabaseManager)
+            row_groups = db.cluster_fact_revenue()
+            print(f"fact_revenue rewritten into {row_groups} row groups")
+            problems = db.validate_warehouse()
+            for problem in problems:
+                print(f"Validation failed: {problem}")
+            if problems and store:
+                raise RuntimeError("Warehouse validation failed, snapshot not published")
+            db.execute_sql("FORCE CHECKPOINT")
+            if compact:
+                db.compact_to(dbname + ".compact")
+        if compact:
+            os.replace(dbname + ".compact", dbname)
+    except Exception:
+        if store:
+            store.discard(dbname)
+        if os.path.exists(dbname + ".compact"):
+            os.remove(dbname + ".compact")
+        raise
 
+    print(f"Database file {size_before / 2**20:.1f} MiB -> {os.path.getsize(dbname) / 2**20:.1f} MiB")
+    if store:
+        store.publish(dbname)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the movie data warehouse.")
+    parser.add_argument("command", nargs="?", choices=["run", "maintain"], default="run",
+                        help="run the ETL (default) or the storage maintenance")
+    parser.add_argument("--revenue-files", default="revenues_per_day.csv",
+                        help="revenue CSV file, or a glob of daily files with --incremental")
+    parser.add_argument("--incremental", action="store_true",
+                        help="append only revenue files that are new or changed since the last run")
+    parser.add_argument("--max-workers", type=int, default=4, help="number of ETL steps run concurrently")
+    parser.add_argument("--snapshot-dir", help="build into a new snapshot in this directory and publish it")
+    parser.add_argument("--parquet-dir", help="export the warehouse to Parquet files in this directory")
+    parser.add_argument("--metrics-dir", help="write per-step SQL metrics to this directory")
+    parser.add_argument("--profile", action="store_true",
+                        help="with --metrics-dir, also keep the EXPLAIN ANALYZE tree of each statement")
+    parser.add_argument("--compact", action="store_true", help="maintain: also shrink the database file")
+    args = parser.parse_args()
+    if args.command == "maintain":
+        maintain(snapshot_dir=args.snapshot_dir, compact=args.compact)
+    else:
+        main(
+            revenue_files=args.revenue_files,
+            incremental=args.incremental,
+            max_workers=args.max_workers,
+            snapshot_dir=args.snapshot_dir,
+            parquet_dir=args.parquet_dir,
+            metrics_dir=args.metrics_dir,
+            profile=args.profile,
+        )
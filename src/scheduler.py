@@ -0,0 +1,149 @@
+"""
+Module providing a small dependency-aware scheduler for ETL steps.
+
+Each step declares the tables it reads (inputs) and writes (outputs). A step
+starts as soon as every step producing one of its inputs has finished, so
+independent loads run concurrently, each on its own DuckDB cursor.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class Step:
+    """
+    A single ETL step.
+
+    Args:
+        name (str): Unique step name used in the timing report.
+        func (Callable): Called with a DatabaseManager bound to a dedicated cursor.
+        inputs (tuple): Tables read by the step.
+        outputs (tuple): Tables written by the step.
+    """
+    name: str
+    func: Callable
+    inputs: tuple = ()
+    outputs: tuple = ()
+
+
+class StepScheduler:
+    """
+    Runs a list of steps as a DAG derived from their inputs and outputs.
+
+    A step depends on every earlier declared step that writes one of its
+    inputs, or that reads or writes one of its outputs, which keeps
+    declaration order for steps touching the same table.
+    """
+
+    def __init__(self, db, steps: list, max_workers: int = 4):
+        """
+        Args:
+            db (DatabaseManager): Manager whose connection provides the cursors.
+            steps (list): Steps in declaration order.
+            max_workers (int): Maximum number of steps running at once.
+        """
+        names = [step.name for step in steps]
+        if len(set(names)) != len(names):
+            raise ValueError("Step names must be unique")
+        self.db = db
+        self.steps = {step.name: step for step in steps}
+        self.max_workers = max_workers
+        self.dependencies = self._build_dependencies(steps)
+        self.timings = {}
+        self._started = time.perf_counter()
+
+    @staticmethod
+    def _build_dependencies(steps: list) -> dict:
+        dependencies = {}
+        for idx, step in enumerate(steps):
+            dependencies[step.name] = {
+                earlier.name for earlier in steps[:idx]
+                if set(step.inputs) & set(earlier.outputs)
+                or set(step.outputs) & (set(earlier.inputs) | set(earlier.outputs))
+            }
+        return dependencies
+
+    def _run_step(self, step: Step):
+        cursor_db = self.db.cursor()
+        cursor_db.raise_errors = True
+        instrumentation = getattr(self.db, "instrumentation", None)
+        start = time.perf_counter()
+        try:
+            if instrumentation is None:
+                step.func(cursor_db)
+            else:
+                with instrumentation.step(step.name):
+                    step.func(cursor_db)
+        finally:
+            self.timings[step.name] = (start, time.perf_counter())
+            cursor_db.close_db()
+
+    def run(self):
+        """
+        Executes all steps, starting each one as soon as its dependencies are
+        done. On the first failure no further steps are started, running ones
+        are awaited and the exception is re-raised.
+        """
+        self.timings = {}
+        done = set()
+        running = {}
+        pending = list(self.steps)
+        self._started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name in [n for n in pending if self.dependencies[n] <= done]:
+                    pending.remove(name)
+                    running[executor.submit(self._run_step, self.steps[name])] = name
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        wait(running)
+                        print(f"Step '{name}' failed: {error}")
+                        self.report()
+                        raise error
+                    done.add(name)
+
+        self.report()
+
+    def critical_path(self) -> list:
+        """
+        Returns the chain of finished steps with the longest summed duration.
+        """
+        longest = {}
+        for name in self.steps:
+            if name not in self.timings:
+                continue
+            start, end = self.timings[name]
+            previous = max(
+                (longest[dep] for dep in self.dependencies[name] if dep in longest),
+                key=lambda chain: chain[0],
+                default=(0.0, []),
+            )
+            longest[name] = (previous[0] + end - start, previous[1] + [name])
+        if not longest:
+            return []
+        return max(longest.values(), key=lambda chain: chain[0])[1]
+
+    def report(self):
+        """
+        Prints per-step start offsets and durations together with the critical path.
+        """
+        if not self.timings:
+            return
+        print("Step timings (start offset / duration):")
+        for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1][0]):
+            print(f"  {name:<32} +{start - self._started:7.2f}s {end - start:8.2f}s")
+
+        path = self.critical_path()
+        path_time = sum(self.timings[n][1] - self.timings[n][0] for n in path)
+        total_time = sum(end - start for start, end in self.timings.values())
+        wall_time = max(end for _, end in self.timings.values()) - self._started
+        print(f"Critical path ({path_time:.2f}s): {' -> '.join(path)}")
+        print(f"Wall time {wall_time:.2f}s, summed step time {total_time:.2f}s")
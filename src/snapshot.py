@@ -0,0 +1,141 @@
+"""
+Module managing blue/green warehouse snapshots.
+
+Each ETL run builds into a fresh copy of the latest published database file.
+Only after the copy is loaded and validated does the "CURRENT" pointer file
+get swapped (atomically, via os.replace) to the new snapshot. Readers always
+open the snapshot named in CURRENT, so they never see a half-built warehouse
+and never wait on the writer's file lock.
+"""
+
+import os
+import shutil
+from datetime import datetime
+
+
+class SnapshotStore:
+    """
+    Directory of warehouse snapshot files plus a CURRENT pointer.
+
+    Args:
+        root: Directory holding the snapshots
+        keep: Number of published snapshots kept, including the current one
+    """
+
+    POINTER = "CURRENT"
+
+    def __init__(self, root: str = "warehouse", keep: int = 3):
+        self.root = root
+        self.keep = max(1, keep)
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def pointer_path(self) -> str:
+        return os.path.join(self.root, self.POINTER)
+
+    @property
+    def state_dir(self) -> str:
+        """
+        Directory for state that must outlive a discarded snapshot (e.g. the
+        OMDb requests already spent), merged into the next run's snapshot.
+        """
+        return os.path.join(self.root, "carried_state")
+
+    def current_path(self):
+        """
+        Returns the path of the latest published snapshot, None if there is none.
+        """
+        try:
+            with open(self.pointer_path, encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        path = os.path.join(self.root, name)
+        return path if name and os.path.exists(path) else None
+
+    def new_snapshot(self, seed: str = None) -> str:
+        """
+        Creates the file for the next snapshot, starting from a copy of the
+        current one when it exists. Before the first publish, the copy starts
+        from `seed` instead, so switching an existing warehouse to snapshots
+        keeps its manifest, extraction queue and history.
+
+        Args:
+            seed (str, optional): Database copied when there is no current snapshot.
+
+        Returns:
+            str: Path of the new, unpublished snapshot.
+        """
+        name = f"Movies-{datetime.now():%Y%m%d%H%M%S%f}.db"
+        path = os.path.join(self.root, name)
+        source = self.current_path()
+        if source is None and seed is not None and os.path.exists(seed):
+            source = seed
+        if source is not None:
+            shutil.copy2(source, path)
+            # a seed that was not closed cleanly still has committed data in its WAL
+            if os.path.exists(source + ".wal"):
+                shutil.copy2(source + ".wal", path + ".wal")
+        return path
+
+    def publish(self, path: str):
+        """
+        Atomically points CURRENT at a finished snapshot and prunes old ones.
+
+        Args:
+            path (str): Snapshot returned by new_snapshot(), already closed.
+        """
+        tmp_pointer = self.pointer_path + ".tmp"
+        with open(tmp_pointer, "w", encoding="utf-8") as f:
+            f.write(os.path.basename(path))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, self.pointer_path)
+        print(f"Published warehouse snapshot {os.path.basename(path)}")
+        self.prune()
+
+    def clear_state(self):
+        """
+        Removes the carried state once a published snapshot has merged it.
+        """
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def discard(self, path: str):
+        """
+        Removes an unpublished snapshot, e.g. after a failed load.
+        """
+        for file_path in (path, path + ".wal"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def prune(self):
+        """
+        Deletes all but the `keep` newest snapshots. The current snapshot is
+        never deleted. On POSIX a file still opened by readers is unlinked
+        anyway and its space is only freed once they close it (the dashboard
+        closes its pool of a snapshot when a newer one is published); on
+        Windows such files cannot be removed and are skipped.
+        """
+        current = self.current_path()
+        snapshots = sorted(
+            name for name in os.listdir(self.root)
+            if name.startswith("Movies-") and name.endswith(".db")
+        )
+        for name in snapshots[:-self.keep]:
+            path = os.path.join(self.root, name)
+            if path == current:
+                continue
+            try:
+                self.discard(path)
+            except OSError:
+                pass
+
+
+def resolve_database(snapshot_dir: str = "warehouse", default: str = "Movies.db") -> str:
+    """
+    Returns the database readers should open: the current snapshot if the
+    ETL publishes snapshots, otherwise the default database file.
+    """
+    if not os.path.isdir(snapshot_dir):
+        return default
+    return SnapshotStore(snapshot_dir).current_path() or default